@@ -0,0 +1,82 @@
+# blog_main/routers.py
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+# Reads go to the primary when the client wrote recently (see
+# blogs.middleware.ReplicaPinningMiddleware), or once the current request
+# (or command) has written, so it sees its own changes despite replication lag.
+_pinned = ContextVar('pinned_to_primary', default=False)
+_wrote = ContextVar('wrote_to_primary', default=False)
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def is_pinned():
+    return _pinned.get() or _wrote.get()
+
+
+def has_written():
+    return _wrote.get()
+
+
+def pin_to_primary():
+    """
+    Read from the primary for the rest of this context. Management commands
+    that read rows and write them back call it first: outside a request,
+    nothing else pins them.
+    """
+    _pinned.set(True)
+
+
+@contextmanager
+def primary_pinning(pinned=False):
+    """Scope of one request: starts pinned or not, and restores the previous state on exit."""
+    pinned_token, wrote_token = _pinned.set(pinned), _wrote.set(False)
+    try:
+        yield
+    finally:
+        _wrote.reset(wrote_token)
+        _pinned.reset(pinned_token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes to the primary and reads to a random replica from
+    DATABASE_REPLICAS. Reads stay on the primary once the current request
+    has written, or while the client is pinned after a recent POST.
+    Without replicas, everything goes to the primary.
+
+    Only ORM queries are routed: SQLiteFTSBackend.search (blogs.utils.search)
+    queries the FTS table through the raw default `connection`, so search
+    always reads from the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or is_pinned():
+            return PRIMARY
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in replicas():
+            return False
+        return None
@@ -71,6 +71,8 @@ TINYMCE_DEFAULT_CONFIG = {
 }
 
 MIDDLEWARE = [
+    'blogs.middleware.RequestProfilingMiddleware',
+    'blogs.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +80,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blogs.middleware.AnonymousPageCacheMiddleware',
     'blogs.middleware.BreadcrumbMiddleware',
 ]
 
@@ -107,13 +110,53 @@ WSGI_APPLICATION = 'blog_main.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# SQLite tuning, applied to every new connection: WAL lets readers carry on
+# while a write is in progress, busy_timeout makes writers wait for the lock
+# (milliseconds) instead of failing with "database is locked", and the rest
+# trade a little durability on power loss and some memory for speed.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,  # KiB
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock when a transaction starts, so two transactions
+            # that read then write wait for each other instead of deadlocking
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Keep connections open across requests; checked before reuse
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas: reads go to a random alias in DATABASE_REPLICAS, writes to
+# 'default' (see blog_main/routers.py). A client that wrote keeps reading
+# from the primary for REPLICA_PIN_SECONDS, longer than the replication lag.
+# Locally, DB_REPLICA_NAME adds a second SQLite file kept in step with
+# `manage.py sync_replica`.
+DATABASE_ROUTERS = ['blog_main.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 15
+
+if os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME'),
+        # The test runner points the replica at the test database
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -137,6 +180,12 @@ STATICFILES_DIRS = [STATIC_DIR]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resized WebP/JPEG copies of blog images (blogs.utils.images), served through srcset
+IMAGE_RENDITION_WIDTHS = [120, 400, 800, 1200]  # pixels
+IMAGE_RENDITION_QUALITY = 80
+# Open Graph images are cropped to this size around the most detailed area
+OG_IMAGE_SIZE = (1200, 630)
+
 # Crispy Forms settings
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap4"
 CRISPY_TEMPLATE_PACK = "bootstrap4"
@@ -155,5 +204,103 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Newsletters are queued in the database and sent by `manage.py send_newsletters`
+NEWSLETTER_BATCH_SIZE = 50      # deliveries per chunk
+NEWSLETTER_RATE_LIMIT = 5       # emails per second (0 = unlimited)
+NEWSLETTER_MAX_ATTEMPTS = 5     # before a delivery is marked failed
+NEWSLETTER_RETRY_BACKOFF = 60   # seconds, doubled after each failed attempt
+NEWSLETTER_POLL_INTERVAL = 10   # seconds between checks for queued emails
+NEWSLETTER_CLAIM_TIMEOUT = 15 * 60  # seconds a worker holds a chunk before another may retry it
+NEWSLETTER_LATEST_POSTS_TTL = 60 * 60  # seconds the welcome email's latest posts block is cached
+
+# CACHE SETTINGS
+# -------------------------------------
+# Local memory by default; set CACHE_DIR to share the caches between
+# processes (web workers, send_newsletters) through the filesystem.
+CACHE_DIR = os.getenv('CACHE_DIR')
+
+
+def _cache_backend(name, timeout, max_entries):
+    if CACHE_DIR:
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, name),
+            'TIMEOUT': timeout,
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        }
+    return {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': name,
+        'TIMEOUT': timeout,
+        'OPTIONS': {'MAX_ENTRIES': max_entries},
+    }
+
+
+CACHES = {
+    'default': _cache_backend('default', 300, 1000),
+    'pages': _cache_backend('pages', 600, 2000),
+}
+
+# Full-page cache for anonymous visitors (blogs.middleware.AnonymousPageCacheMiddleware)
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'True') == 'True'
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 600  # seconds; pages are also invalidated as soon as their content changes
+# Query parameters ignored when building the page cache key
+PAGE_CACHE_IGNORED_PARAMS = [
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga',
+]
+
+# Seconds the page boundary tables of the keyset-paginated post listings are
+# cached (they are also rebuilt as soon as a post changes)
+KEYSET_BOUNDARIES_TTL = 600
+
+# Comments shown on a post page and returned per "Load more comments" request
+COMMENTS_PAGE_SIZE = 20
+
+# Related posts (blogs.utils.related): neighbours stored per post, TF-IDF
+# vocabulary size, score bonus for posts of the same category, and the file
+# holding the post vectors for the incremental updates that the
+# update_related_posts worker applies after posts are saved
+RELATED_POSTS_COUNT = 6
+RELATED_POSTS_MAX_FEATURES = 4096
+RELATED_POSTS_CATEGORY_BOOST = 0.05
+RELATED_POSTS_INDEX_PATH = os.getenv('RELATED_POSTS_INDEX_PATH', str(BASE_DIR / 'related_posts.npz'))
+
+# URLs per page of the paged section sitemaps (sitemap-blogs.xml?p=N)
+SITEMAP_PAGE_SIZE = 1000
+
+# Per-request query count and timings (blogs.middleware.RequestProfilingMiddleware):
+# requests kept per process for the dashboard performance page, and budgets
+# above which a request is logged to the 'blogs.performance' logger. It wraps
+# every query and template render, so it is off unless DEBUG or opted in
+PERFORMANCE_PROFILING_ENABLED = os.getenv('PERFORMANCE_PROFILING_ENABLED', str(DEBUG)) == 'True'
+PERFORMANCE_BUFFER_SIZE = 5000
+PERFORMANCE_QUERY_BUDGET = 25
+PERFORMANCE_TIME_BUDGET_MS = 500
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# SEARCH SETTINGS
+# -------------------------------------
+# Dotted path to a search backend class; leave unset to use SQLite FTS5
+# on SQLite and the portable database backend everywhere else.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND') or None
+SEARCH_MAX_RESULTS = 500
+
+# SITE CACHE SETTINGS
+# -------------------------------------
+# Process-local cache for site-wide lists (sidebar categories, social links)
+SITE_CACHE_TTL = 60  # seconds
+SITE_CACHE_MAXSIZE = 128
+
+# AD SERVING SETTINGS
+# -------------------------------------
+# Seconds before each process rebuilds its in-memory ad index
+# (it is also rebuilt immediately whenever an Advertisement changes)
+AD_INDEX_TTL = 60
+# Ad impressions/clicks are buffered per process and written in batches
+# once this many seconds have passed or this many increments are pending
+AD_COUNTER_FLUSH_INTERVAL = 10
+AD_COUNTER_FLUSH_THRESHOLD = 500
@@ -1,33 +1,52 @@
 # blogs/sitemaps.py
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Max
 from django.urls import reverse
 from blogs.models import Blogs, Category, LegalPage
 
+# URLs per sitemap page; sitemap.xml is an index pointing at the pages
+SITEMAP_PAGE_SIZE = getattr(settings, 'SITEMAP_PAGE_SIZE', 1000)
+
+
 class BlogSitemap(Sitemap):
     changefreq = "weekly"
     priority = 0.8
     protocol = 'https'  # Use 'http' for development
+    limit = SITEMAP_PAGE_SIZE
 
     def items(self):
-        return Blogs.objects.filter(status='published')
+        # Only the two columns the sitemap needs; each page is fetched with LIMIT/OFFSET
+        return Blogs.objects.filter(status='published').order_by('pk').values('slug', 'updated_at')
 
-    def lastmod(self, obj):
-        return obj.updated_at
+    def location(self, item):
+        return reverse('blog_detail', kwargs={'slug': item['slug']})
+
+    def lastmod(self, item):
+        return item['updated_at']
+
+    def get_latest_lastmod(self):
+        # Aggregate in the database instead of loading every post
+        return Blogs.objects.filter(status='published').aggregate(latest=Max('updated_at'))['latest']
 
 class CategorySitemap(Sitemap):
     changefreq = "monthly"
     priority = 0.6
     protocol = 'https'
+    limit = SITEMAP_PAGE_SIZE
 
     def items(self):
-        return Category.objects.all()
+        return Category.objects.order_by('pk').values('id', 'updated_at')
 
-    def lastmod(self, obj):
-        return obj.updated_at
+    def lastmod(self, item):
+        return item['updated_at']
+
+    def get_latest_lastmod(self):
+        return Category.objects.aggregate(latest=Max('updated_at'))['latest']
 
     def location(self, obj):
         # Reverse to category posts page
-        return reverse('posts_by_category', kwargs={'category_id': obj.id})
+        return reverse('posts_by_category', kwargs={'category_id': obj['id']})
 
 class StaticSitemap(Sitemap):
     priority = 0.9
@@ -48,7 +67,10 @@ class LegalSitemap(Sitemap):
 
     def items(self):
         # Only published legal pages
-        return LegalPage.objects.filter(is_published=True)
+        return LegalPage.objects.filter(is_published=True).order_by('page_type').only('page_type', 'last_updated')
+
+    def lastmod(self, obj):
+        return obj.last_updated
 
     def location(self, obj):
         # Map page_type to correct URL name in urls.py
@@ -1,11 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
 from blog_main import views
-from blogs.views import blog_detail, search, home, posts_by_category, legal_page_detail, contact_us, write_for_us
+from blogs.views import blog_detail, blog_comments, search, home, posts_by_category, legal_page_detail, contact_us, write_for_us
 from django.conf.urls.static import static
 from django.conf import settings
-from django.contrib.sitemaps.views import sitemap
+from django.contrib.sitemaps.views import index, sitemap
 from .sitemaps import BlogSitemap, CategorySitemap, StaticSitemap, LegalSitemap
+from blogs.utils.conditional import conditional_page, sitemap_freshness
 
 # Sitemap configuration
 sitemaps = {
@@ -27,6 +28,7 @@ urlpatterns = [
 
     # Individual blog detail (keep separate)
     path('blogs/<slug:slug>/', blog_detail, name='blog_detail'),
+    path('blogs/<slug:slug>/comments/', blog_comments, name='blog_comments'),
 
     path('category/<int:category_id>/',
          posts_by_category, name='posts_by_category'),
@@ -54,7 +56,10 @@ urlpatterns = [
     path('dashboard/', include('dashboards.urls')),
 
     # SEO enhancements
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps},
+    # sitemap.xml is an index of paged section sitemaps (sitemap-blogs.xml?p=2, ...)
+    path('sitemap.xml', conditional_page(sitemap_freshness)(index), {'sitemaps': sitemaps},
+         name='django.contrib.sitemaps.views.index'),
+    path('sitemap-<section>.xml', conditional_page(sitemap_freshness)(sitemap), {'sitemaps': sitemaps},
          name='django.contrib.sitemaps.views.sitemap'),
     path('robots.txt', include('robots.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -6,7 +6,7 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.utils.http import url_has_allowed_host_and_scheme
 
 def home(request):
-    categories = Category.objects.all()
+    categories = Category.objects.with_post_count()
     featured_post = Blogs.objects.filter(is_featured=True)
     regular_posts = Blogs.objects.filter(is_featured=False)[:6]
     
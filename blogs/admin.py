@@ -4,16 +4,19 @@ from django.utils.html import format_html
 from django.contrib import messages
 from django import forms
 from django.urls import path, reverse
-from django.conf import settings
-from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from datetime import timedelta
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
 from .models import (
     Category, Blogs, Comment, Advertisement,
-    LegalPage, ContactSubmission, WriteForUsSubmission, NewsletterSubscriber, SocialMedia
+    LegalPage, ContactSubmission, WriteForUsSubmission, NewsletterSubscriber, SocialMedia,
+    NewsletterJob, NewsletterDelivery
 )
+from .utils.ad_counters import get_ad_totals
+from .utils.ad_reports import GROUP_BY_CHOICES, build_ad_report
+from .utils.newsletter import enqueue_custom_newsletter
 
 # -------------------------------
 # CATEGORY ADMIN
@@ -26,6 +29,14 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('category_name',)
     readonly_fields = ('post_count', 'created_at', 'updated_at')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_post_count()
+
+    def post_count(self, obj):
+        return obj.post_count
+    post_count.short_description = "Published Posts"
+    post_count.admin_order_field = 'published_post_count'
+
 # -------------------------------
 # COMMENT INLINE
 # -------------------------------
@@ -63,8 +74,9 @@ class BlogsAdmin(admin.ModelAdmin):
     search_fields = ('title', 'short_description', 'blog_body',
                      'meta_title', 'meta_description')
     readonly_fields = (
-        'created_at', 'updated_at', 'estimated_reading_time',
-        'get_canonical_url', 'og_image_preview', 'image_thumbnail'
+        'created_at', 'updated_at', 'estimated_reading_time', 'word_count',
+        'get_canonical_url', 'og_image_preview', 'image_thumbnail',
+        'og_image_width', 'og_image_height',
     )
     list_editable = ('status', 'is_featured')
     prepopulated_fields = {'slug': ('title',)}  # ADD THIS LINE
@@ -77,6 +89,7 @@ class BlogsAdmin(admin.ModelAdmin):
             'fields': ('meta_title', 'meta_description', 'focus_keyword',
                        'canonical_url', 'get_canonical_url',
                        'og_title', 'og_description', 'og_image', 'og_image_preview',
+                       'og_image_width', 'og_image_height',
                        'twitter_card_type', 'twitter_site', 'schema_type')
         }),
         ('Status & Visibility', {
@@ -85,6 +98,9 @@ class BlogsAdmin(admin.ModelAdmin):
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
         }),
+        ('Reading Stats', {
+            'fields': ('word_count', 'estimated_reading_time')
+        }),
     )
 
     # ADD THIS METHOD TO FIX THE "View on site" ERROR
@@ -112,6 +128,7 @@ class BlogsAdmin(admin.ModelAdmin):
     def estimated_reading_time(self, obj):
         return f"{obj.estimated_reading_time} min"
     estimated_reading_time.short_description = "Est. Reading Time"
+    estimated_reading_time.admin_order_field = 'reading_time'
 
     def get_canonical_url(self, obj):
         return obj.get_canonical_url()
@@ -145,6 +162,20 @@ class CommentAdmin(admin.ModelAdmin):
 # -------------------------------
 
 
+class AdReportForm(forms.Form):
+    start = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    group_by = forms.ChoiceField(choices=GROUP_BY_CHOICES, initial='day')
+    ad = forms.ModelChoiceField(queryset=Advertisement.objects.all(), required=False, empty_label="All ads")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end and start > end:
+            raise forms.ValidationError("Start date must be before end date.")
+        return cleaned_data
+
+
 @admin.register(Advertisement)
 class AdvertisementAdmin(admin.ModelAdmin):
     list_display = ('name', 'ad_type', 'placement_area', 'is_active', 'priority',
@@ -153,10 +184,13 @@ class AdvertisementAdmin(admin.ModelAdmin):
                    'is_active', 'target_categories')
     search_fields = ('name', 'ad_code', 'alt_text')
     readonly_fields = ('created_at', 'updated_at',
-                       'is_currently_active', 'impressions', 'clicks')
+                       'is_currently_active', 'total_impressions', 'total_clicks')
     list_editable = ('is_active', 'priority')
     filter_horizontal = ('target_categories',)  # Better for ManyToMany fields
 
+    # Adds a "Performance Report" button to the change list
+    change_list_template = "admin/advertisement_change_list.html"
+
     def target_categories_list(self, obj):
         return ", ".join([cat.category_name for cat in obj.target_categories.all()])
     target_categories_list.short_description = "Target Categories"
@@ -166,6 +200,49 @@ class AdvertisementAdmin(admin.ModelAdmin):
     is_currently_active.boolean = True
     is_currently_active.short_description = "Currently Active"
 
+    # Stored totals plus counts still buffered in this process
+    def total_impressions(self, obj):
+        return get_ad_totals(obj)[0]
+    total_impressions.short_description = "Impressions"
+
+    def total_clicks(self, obj):
+        return get_ad_totals(obj)[1]
+    total_clicks.short_description = "Clicks"
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('report/', self.admin_site.admin_view(self.ad_report),
+                 name='ad_report'),
+        ]
+        return custom_urls + urls
+
+    # Report over the pre-aggregated hourly rollups
+    def ad_report(self, request):
+        today = timezone.localdate()
+        data = request.GET if 'start' in request.GET else {
+            'start': today - timedelta(days=6), 'end': today, 'group_by': 'day',
+        }
+        form = AdReportForm(data)
+        rows, totals = [], None
+        if form.is_valid():
+            rows, totals = build_ad_report(
+                form.cleaned_data['start'],
+                form.cleaned_data['end'],
+                form.cleaned_data['group_by'],
+                form.cleaned_data['ad'],
+            )
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Advertisement Performance',
+            'opts': self.model._meta,
+            'form': form,
+            'rows': rows,
+            'totals': totals,
+        }
+        return render(request, 'admin/ad_report.html', context)
+
 # -------------------------------
 # LEGAL PAGE ADMIN
 # -------------------------------
@@ -240,59 +317,71 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
         custom_urls = [
             path('send-newsletter/', self.admin_site.admin_view(self.send_newsletter),
                  name='send_newsletter'),
+            path('newsletter-jobs/<int:job_id>/', self.admin_site.admin_view(self.newsletter_job_progress),
+                 name='newsletter_job_progress'),
         ]
         return custom_urls + urls
 
-    # View to send newsletter
+    # View to queue a newsletter; the send_newsletters worker delivers it
     def send_newsletter(self, request):
         if request.method == 'POST':
             form = CustomNewsletterForm(request.POST)
             if form.is_valid():
-                subject = form.cleaned_data['subject']
-                message = form.cleaned_data['message']
-
-                subscribers = NewsletterSubscriber.objects.all()
-                if not subscribers:
+                job = enqueue_custom_newsletter(
+                    form.cleaned_data['subject'],
+                    form.cleaned_data['message'],
+                    created_by=request.user,
+                )
+                if job is None:
                     self.message_user(
                         request, "No subscribers found.", level='warning')
                     return redirect('admin:send_newsletter')
 
-                context = {
-                    'subject': subject,
-                    'message': message,
-                    'site_name': getattr(settings, 'SITE_NAME', 'My Blog'),
-                    'domain': getattr(settings, 'DOMAIN', 'http://127.0.0.1:8000/'),
-                }
-
-                # Render email templates
-                text_body = render_to_string(
-                    'newsletter/custom_newsletter.txt', context)
-                html_body = render_to_string(
-                    'newsletter/custom_newsletter.html', context)
-
-                emails = [sub.email for sub in subscribers]
-                msg = EmailMultiAlternatives(
-                    subject=subject,
-                    body=text_body,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    bcc=emails
-                )
-                msg.attach_alternative(html_body, "text/html")
-
-                try:
-                    msg.send()
-                    self.message_user(
-                        request, f"Newsletter sent to {len(emails)} subscribers.")
-                except Exception as e:
-                    self.message_user(
-                        request, f"Error sending newsletter: {e}", level='error')
-
-                return redirect('..')
+                self.message_user(
+                    request, f"Newsletter queued for {job.total_count} subscribers (job #{job.pk}).")
+                return redirect('admin:newsletter_job_progress', job_id=job.pk)
         else:
             form = CustomNewsletterForm()
 
         return render(request, 'admin/send_newsletter.html', {'form': form, 'title': 'Send Newsletter'})
 
+    # Delivery progress of a queued newsletter
+    def newsletter_job_progress(self, request, job_id):
+        job = get_object_or_404(NewsletterJob, pk=job_id)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Newsletter #{job.pk}',
+            'opts': self.model._meta,
+            'job': job,
+            'failed_deliveries': job.deliveries.filter(status=NewsletterDelivery.STATUS_FAILED)[:50],
+            'retrying_deliveries': job.deliveries.filter(
+                status=NewsletterDelivery.STATUS_PENDING, attempts__gt=0)[:50],
+        }
+        return render(request, 'admin/newsletter_job_progress.html', context)
+
+
+# -------------------------------
+# Newsletter Job Admin
+# -------------------------------
+
+
+@admin.register(NewsletterJob)
+class NewsletterJobAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'kind', 'status', 'total_count', 'sent_count', 'failed_count', 'created_at', 'progress_link')
+    list_filter = ('kind', 'status')
+    search_fields = ('subject',)
+    readonly_fields = ('kind', 'status', 'total_count', 'sent_count', 'failed_count',
+                       'created_by', 'created_at', 'finished_at')
+
+    def progress_link(self, obj):
+        url = reverse('admin:newsletter_job_progress', args=[obj.pk])
+        return format_html('<a href="{}">Progress</a>', url)
+    progress_link.short_description = "Progress"
+
+    def has_add_permission(self, request):
+        # Jobs are created from the Send Newsletter form
+        return False
+
 
 @admin.register(SocialMedia)
 class SocialMediaAdmin(admin.ModelAdmin):
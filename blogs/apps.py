@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BlogsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blogs'
+
+    def ready(self):
+        # Register model signal handlers (search index sync, etc.)
+        from . import signals  # noqa: F401
@@ -1,13 +1,12 @@
 # blogs/context_processors.py
-from .models import Category, SocialMedia
 from django.conf import settings
 from urllib.parse import urlencode
-from .utils.breadcrumbs import BreadcrumbBuilder
+from .utils.breadcrumbs import get_request_breadcrumbs
+from .utils.site_cache import get_sidebar_categories, get_social_media_links
 
 def get_categories(request):
-    """Provides all categories to templates"""
-    categories = Category.objects.all()
-    return {'categories': categories}
+    """Provides all categories to templates (served from the site cache)"""
+    return {'categories': get_sidebar_categories()}
 
 
 def advanced_canonical_url(request):
@@ -62,9 +61,8 @@ def advanced_canonical_url(request):
     }
 
 def breadcrumbs(request):
-    builder = BreadcrumbBuilder(request)
-    breadcrumbs_list = builder.auto_detect_from_url().build()
-    return {'breadcrumbs': breadcrumbs_list}
+    """Expose the request's breadcrumbs (view-provided or lazily auto-detected)"""
+    return {'breadcrumbs': get_request_breadcrumbs(request)}
 
 def seo_context(request):
     default_meta_title = "WiseMixMedia - Professional Blogging Platform"
@@ -77,5 +75,5 @@ def seo_context(request):
 def social_media_links(request):
     """Add social media links to all templates"""
     return {
-        'social_media_links': SocialMedia.objects.filter(is_active=True)
+        'social_media_links': get_social_media_links()
     }
\ No newline at end of file
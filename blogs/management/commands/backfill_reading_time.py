@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from blog_main.routers import pin_to_primary
+from blogs.models import Blogs
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored word_count and reading_time of existing blog posts in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Number of posts loaded and updated per batch (default: 200).")
+
+    def handle(self, *args, **options):
+        pin_to_primary()  # rows are read to be written back
+        batch_size = max(1, options['batch_size'])
+        queryset = Blogs.objects.only('id', 'blog_body', 'word_count', 'reading_time').order_by('pk')
+
+        batch, updated = [], 0
+        for post in queryset.iterator(chunk_size=batch_size):
+            post.update_reading_stats()
+            batch.append(post)
+            if len(batch) >= batch_size:
+                updated += self.flush(batch, batch_size)
+                batch = []
+        if batch:
+            updated += self.flush(batch, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated reading stats for {updated} posts."))
+
+    def flush(self, batch, batch_size):
+        # bulk_update skips save() and auto_now, so updated_at is left untouched
+        Blogs.objects.bulk_update(batch, ['word_count', 'reading_time'], batch_size=batch_size)
+        return len(batch)
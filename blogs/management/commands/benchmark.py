@@ -0,0 +1,186 @@
+import json
+import os
+import platform
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blogs.utils.benchmark import WORDS, git_revision, measure, reset_process_caches, seed_dataset
+from blogs.utils.profiling import request_stats
+
+SCENARIOS = (
+    'home', 'blog_detail', 'search', 'posts_by_category',
+    'sitemap_index', 'sitemap_blogs', 'ad_impression', 'ad_click',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the public views against a throwaway database seeded with a synthetic site. "
+        "Reports requests per second, latency percentiles and query counts, and saves them as JSON "
+        "(with the git commit) so runs can be compared."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=500, help="Posts to seed (default: 500).")
+        parser.add_argument('--categories', type=int, default=20, help="Categories to seed (default: 20).")
+        parser.add_argument('--ads', type=int, default=16, help="Advertisements to seed (default: 16).")
+        parser.add_argument('--comments', type=int, default=5, help="Average comments per post (default: 5).")
+        parser.add_argument('--subscribers', type=int, default=1000,
+                            help="Newsletter subscribers to seed (default: 1000).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed of the dataset (default: 0).")
+        parser.add_argument('--requests', type=int, default=200,
+                            help="Measured requests per scenario (default: 200).")
+        parser.add_argument('--warmup', type=int, default=10,
+                            help="Unmeasured requests per scenario before measuring (default: 10).")
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                            help="Only run this scenario (repeatable; default: all).")
+        parser.add_argument('--page-cache', action='store_true',
+                            help="Keep the anonymous page cache on (default: off, to measure the views themselves).")
+        parser.add_argument('--output', default=None,
+                            help="JSON results path (default: benchmarks/<timestamp>-<commit>.json).")
+        parser.add_argument('--compare', default=None,
+                            help="Earlier JSON results to print the differences against.")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help="Destroy a leftover benchmark database without asking.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1.")
+        baseline = self.load_results(options['compare']) if options['compare'] else None
+        commit, dirty = git_revision()
+
+        with tempfile.TemporaryDirectory() as workdir, override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            CACHES={
+                alias: {**config, 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                        'LOCATION': f'benchmark-{alias}'}
+                for alias, config in settings.CACHES.items()
+            },
+            PAGE_CACHE_ENABLED=options['page_cache'],
+            # Only the primary is swapped for the throwaway database
+            DATABASE_REPLICAS=[],
+            MEDIA_ROOT=os.path.join(workdir, 'media'),
+            RELATED_POSTS_INDEX_PATH=os.path.join(workdir, 'related_posts.npz'),
+        ):
+            old_name = self.create_database(workdir, options['interactive'])
+            try:
+                dataset = seed_dataset(
+                    posts=options['posts'], categories=options['categories'], ads=options['ads'],
+                    comments=options['comments'], subscribers=options['subscribers'], seed=options['seed'],
+                )
+                self.stdout.write(
+                    "Seeded " + ", ".join(f"{count} {name}" for name, count in dataset.items())
+                )
+                results = self.run_scenarios(options)
+            finally:
+                # Nothing buffered may be written after the database is gone
+                reset_process_caches()
+                request_stats.clear()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'meta': {
+                'commit': commit,
+                'dirty': dirty,
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'platform': platform.platform(),
+                'page_cache': options['page_cache'],
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'seed': options['seed'],
+                'dataset': dataset,
+            },
+            'results': results,
+        }
+        path = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks',
+            f"{timezone.now():%Y%m%d-%H%M%S}-{(commit or 'unknown')[:12]}.json",
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as results_file:
+            json.dump(report, results_file, indent=2)
+
+        self.print_results(results, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Results saved to {path}"))
+
+    def create_database(self, workdir, interactive):
+        if connection.vendor == 'sqlite':
+            # A file, like production, rather than the in-memory test database
+            connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'benchmark.sqlite3')
+        return connection.creation.create_test_db(
+            verbosity=0, autoclobber=not interactive, serialize=False,
+        )
+
+    def scenario_requests(self):
+        from blogs.models import Advertisement, Blogs, Category
+
+        slugs = list(Blogs.objects.published().order_by('-created_at').values_list('slug', flat=True)[:50])
+        category_ids = list(Category.objects.values_list('pk', flat=True))
+        ad_ids = list(Advertisement.objects.values_list('pk', flat=True))
+        return {
+            'home': ('get', [reverse('home'), f"{reverse('home')}?page=2"]),
+            'blog_detail': ('get', [reverse('blog_detail', args=[slug]) for slug in slugs]),
+            'search': ('get', [f"{reverse('search')}?keyword={word}" for word in WORDS[:20]]),
+            'posts_by_category': ('get', [reverse('posts_by_category', args=[pk]) for pk in category_ids]),
+            'sitemap_index': ('get', [reverse('django.contrib.sitemaps.views.index')]),
+            'sitemap_blogs': ('get', [reverse('django.contrib.sitemaps.views.sitemap', args=['blogs'])]),
+            'ad_impression': ('post', [reverse('record_impression', args=[pk]) for pk in ad_ids]),
+            'ad_click': ('post', [reverse('record_click', args=[pk]) for pk in ad_ids]),
+        }
+
+    def run_scenarios(self, options):
+        requests = self.scenario_requests()
+        results = {}
+        for name in options['scenario'] or SCENARIOS:
+            method, urls = requests[name]
+            if not urls:
+                self.stderr.write(f"{name}: nothing to request with this dataset, skipped")
+                continue
+            reset_process_caches()
+            results[name] = measure(Client(), method, urls, options['requests'], options['warmup'])
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{name}: done")
+        return results
+
+    @staticmethod
+    def load_results(path):
+        try:
+            with open(path) as results_file:
+                return json.load(results_file)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+    def print_results(self, results, baseline=None):
+        previous = (baseline or {}).get('results', {})
+        self.stdout.write(
+            f"{'scenario':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}"
+            + ("   vs baseline" if baseline else "")
+        )
+        for name, result in results.items():
+            latency = result['latency_ms']
+            line = (
+                f"{name:<20}{result['requests_per_second']:>10.1f}{latency['p50']:>10.2f}"
+                f"{latency['p95']:>10.2f}{latency['p99']:>10.2f}{result['queries']['p50']:>9}"
+            )
+            before = previous.get(name)
+            if before:
+                change = (latency['p95'] - before['latency_ms']['p95']) / before['latency_ms']['p95'] * 100
+                line += (
+                    f"   p95 {change:+.1f}%, queries {before['queries']['p50']} -> {result['queries']['p50']}"
+                )
+            self.stdout.write(line)
+        if baseline:
+            self.stdout.write(f"Baseline: commit {baseline['meta'].get('commit')} ({baseline['meta'].get('created_at')})")
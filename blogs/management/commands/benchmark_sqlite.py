@@ -0,0 +1,188 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blogs.utils.profiling import percentile
+
+# The "before" profile: what Django does with a bare sqlite3 DATABASES entry.
+# Rollback journal, 5 s lock wait, deferred transactions, and a new
+# connection per request
+BASELINE = {'pragmas': {}, 'timeout': 5.0, 'begin': 'BEGIN', 'persistent': False}
+
+SCHEMA = """
+CREATE TABLE posts (id INTEGER PRIMARY KEY, title TEXT, body TEXT, status TEXT, created_at REAL);
+CREATE INDEX posts_created ON posts (status, created_at);
+CREATE TABLE ads (id INTEGER PRIMARY KEY, impressions INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE ad_hourly (
+    ad_id INTEGER NOT NULL, hour INTEGER NOT NULL, impressions INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (ad_id, hour)
+);
+"""
+
+
+def tuned_profile():
+    """The "after" profile: the PRAGMAs and transaction mode in settings, with persistent connections."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    options = settings.DATABASES['default'].get('OPTIONS', {})
+    mode = options.get('transaction_mode')
+    return {
+        'pragmas': pragmas,
+        'timeout': pragmas.get('busy_timeout', 5000) / 1000,
+        'begin': f'BEGIN {mode}' if mode else 'BEGIN',
+        'persistent': True,
+    }
+
+
+def _connect(path, profile):
+    connection = sqlite3.connect(path, timeout=profile['timeout'], isolation_level=None)
+    for name, value in profile['pragmas'].items():
+        connection.execute(f'PRAGMA {name}={value}')
+    return connection
+
+
+def _create_database(path, profile, posts, ads):
+    connection = _connect(path, profile)
+    connection.executescript(SCHEMA)
+    rng = random.Random(0)
+    now = time.time()
+    connection.execute('BEGIN')
+    connection.executemany(
+        'INSERT INTO posts (title, body, status, created_at) VALUES (?, ?, ?, ?)',
+        ((f'Post {i}', 'lorem ipsum ' * rng.randint(200, 800), 'published', now - i * 60) for i in range(posts)),
+    )
+    connection.executemany('INSERT INTO ads (id) VALUES (?)', ((i,) for i in range(1, ads + 1)))
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def _read(connection, rng, posts):
+    # A listing page: one page of cards plus the total
+    offset = rng.randrange(0, max(posts - 12, 1))
+    connection.execute(
+        "SELECT id, title, substr(body, 1, 200) FROM posts WHERE status = 'published' "
+        "ORDER BY created_at DESC LIMIT 12 OFFSET ?", (offset,),
+    ).fetchall()
+    connection.execute("SELECT COUNT(*) FROM posts WHERE status = 'published'").fetchone()
+
+
+def _write(connection, rng, ads, begin):
+    # An ad counter flush: bump the totals and the hourly rollups in one transaction
+    ad_ids = rng.sample(range(1, ads + 1), min(3, ads))
+    hour = int(time.time() // 3600)
+    connection.execute(begin)
+    try:
+        connection.execute(
+            f"SELECT impressions FROM ads WHERE id IN ({','.join('?' * len(ad_ids))})", ad_ids,
+        ).fetchall()
+        for ad_id in ad_ids:
+            connection.execute('UPDATE ads SET impressions = impressions + 1 WHERE id = ?', (ad_id,))
+            connection.execute('INSERT OR IGNORE INTO ad_hourly (ad_id, hour) VALUES (?, ?)', (ad_id, hour))
+            connection.execute(
+                'UPDATE ad_hourly SET impressions = impressions + 1 WHERE ad_id = ? AND hour = ?', (ad_id, hour),
+            )
+        connection.execute('COMMIT')
+    except sqlite3.OperationalError:
+        if connection.in_transaction:
+            connection.execute('ROLLBACK')
+        raise
+
+
+def _worker(path, profile, role, start_at, duration, posts, ads, seed):
+    """Runs in a worker process: one simulated client doing reads or writes until the time is up."""
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    connection = _connect(path, profile) if profile['persistent'] else None
+    time.sleep(max(start_at - time.time(), 0))
+    deadline = start_at + duration
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            current = connection or _connect(path, profile)
+            if role == 'read':
+                _read(current, rng, posts)
+            else:
+                _write(current, rng, ads, profile['begin'])
+            if connection is None:
+                current.close()
+        except sqlite3.OperationalError:
+            # "database is locked": the request would have failed
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    return role, latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent read/write throughput of SQLite with Django's defaults and with the "
+        "tuning in settings (WAL, busy timeout, mmap, immediate transactions, persistent connections)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help="Reading processes (default: 8).")
+        parser.add_argument('--writers', type=int, default=4, help="Writing processes (default: 4).")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds per profile (default: 10).")
+        parser.add_argument('--posts', type=int, default=2000, help="Posts in the test database (default: 2000).")
+        parser.add_argument('--ads', type=int, default=20, help="Ads in the test database (default: 20).")
+        parser.add_argument('--output', default=None, help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options['readers'] + options['writers'] < 1 or options['ads'] < 1:
+            raise CommandError("Need at least one reader or writer, and one ad.")
+        profiles = {'before': BASELINE, 'after': tuned_profile()}
+        results = {}
+        with tempfile.TemporaryDirectory() as workdir:
+            for name, profile in profiles.items():
+                path = os.path.join(workdir, f'{name}.sqlite3')
+                _create_database(path, profile, options['posts'], options['ads'])
+                results[name] = self.run_profile(path, profile, options)
+
+        self.stdout.write(
+            f"{'profile':<10}{'reads/s':>10}{'writes/s':>10}{'read p95':>10}{'write p95':>11}{'locked':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<10}{result['reads_per_second']:>10.1f}{result['writes_per_second']:>10.1f}"
+                f"{result['read_ms']['p95']:>8.2f}ms{result['write_ms']['p95']:>9.2f}ms{result['locked_errors']:>8}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({'options': {key: options[key] for key in ('readers', 'writers', 'duration', 'posts', 'ads')},
+                           'profiles': profiles, 'results': results}, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+    def run_profile(self, path, profile, options):
+        roles = ['read'] * options['readers'] + ['write'] * options['writers']
+        start_at = time.time() + 1  # let every process start before the clock runs
+        with ProcessPoolExecutor(max_workers=len(roles)) as executor:
+            futures = [
+                executor.submit(
+                    _worker, path, profile, role, start_at, options['duration'],
+                    options['posts'], options['ads'], seed,
+                )
+                for seed, role in enumerate(roles)
+            ]
+            outcomes = [future.result() for future in futures]
+
+        latencies = {'read': [], 'write': []}
+        errors = 0
+        for role, role_latencies, role_errors in outcomes:
+            latencies[role].extend(role_latencies)
+            errors += role_errors
+        result = {'locked_errors': errors}
+        for role in ('read', 'write'):
+            values = sorted(latencies[role])
+            result[f'{role}s_per_second'] = len(values) / options['duration']
+            result[f'{role}_ms'] = {
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99),
+            }
+        return result
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from blog_main.routers import pin_to_primary
+from blogs.models import Blogs
+from blogs.utils.page_cache import bump_page_cache_tags
+
+FIELDS = ['og_image', 'og_image_width', 'og_image_height', 'image_renditions']
+
+
+def _init_worker():
+    # Workers started with spawn/forkserver need their own app registry
+    django.setup()
+
+
+def _refresh(post, force):
+    """Runs in a worker: the same image processing Blogs.save() does, without saving."""
+    if force:
+        post.image_renditions = {}
+    changed = post.refresh_og_image()
+    changed = post.refresh_image_renditions() or changed
+    return post if changed else None
+
+
+class Command(BaseCommand):
+    help = "Create the OG images and WebP/JPEG renditions of existing blog posts in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Number of worker processes resizing images (default: CPU count).")
+        parser.add_argument('--force', action='store_true',
+                            help="Rebuild images that are already up to date.")
+
+    def handle(self, *args, **options):
+        pin_to_primary()  # rows are read to be written back
+        posts = list(
+            Blogs.objects.filter(Q(blog_image__gt='') | Q(og_image__gt=''))
+            .only('id', 'title', *Blogs.IMAGE_FIELDS, *FIELDS).order_by('pk')
+        )
+        if not posts:
+            self.stdout.write(self.style.SUCCESS("No posts with images."))
+            return
+
+        # Don't let forked workers inherit open database connections
+        connections.close_all()
+        changed = []
+        workers = max(1, options['workers'])
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = [executor.submit(_refresh, post, options['force']) for post in posts]
+            for future in as_completed(futures):
+                post = future.result()
+                if post is not None:
+                    changed.append(post)
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f"{post.title}: {post.og_image.name}")
+
+        # bulk_update skips save() and auto_now, so updated_at is left untouched
+        Blogs.objects.bulk_update(changed, FIELDS, batch_size=200)
+        if changed:
+            bump_page_cache_tags('posts')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed images of {len(posts)} posts with {workers} workers; updated {len(changed)}."
+        ))
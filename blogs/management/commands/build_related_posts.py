@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog_main.routers import pin_to_primary
+from blogs.utils.related import index_path, rebuild_related_posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the related posts of every published post from TF-IDF similarity. "
+        "Saves are then applied incrementally by update_related_posts; rerun to refresh the vocabulary."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=None,
+                            help="Related posts stored per post (default: RELATED_POSTS_COUNT).")
+        parser.add_argument('--max-features', type=int, default=None,
+                            help="Vocabulary size (default: RELATED_POSTS_MAX_FEATURES).")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Posts compared against the corpus per matrix product (default: RELATED_POSTS_BATCH_SIZE).")
+
+    def handle(self, *args, **options):
+        pin_to_primary()  # the index must match the posts on the primary
+        started = time.monotonic()
+        posts, links = rebuild_related_posts(options['k'], options['max_features'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {links} related posts for {posts} published posts in {time.monotonic() - started:.1f}s "
+            f"(index: {index_path()})."
+        ))
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blogs.utils.images import OG_IMAGE_DIR, OPTIMIZABLE_EXTENSIONS, RENDITIONS_DIR, recompress_image
+
+MANIFEST_NAME = '.optimize_media.json'
+# Written by blogs.utils.images, already optimized
+GENERATED_DIRS = (RENDITIONS_DIR, OG_IMAGE_DIR)
+MANIFEST_SAVE_EVERY = 25
+
+
+def _sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def _optimize(path, dry_run, jpeg_quality, webp_quality, min_saving):
+    """
+    Runs in a worker. Recompresses one file in place: same path and format,
+    so every ImageField pointing at it stays valid. The file is only
+    replaced when that saves at least `min_saving` of its size.
+    """
+    try:
+        with open(path, 'rb') as source:
+            data = source.read()
+    except OSError as exc:
+        return {'path': path, 'before': 0, 'after': 0, 'status': 'error', 'error': str(exc)}
+    result = {'path': path, 'before': len(data), 'after': len(data), 'sha1': _sha1(data), 'status': 'unchanged'}
+    try:
+        optimized = recompress_image(data, os.path.splitext(path)[1], jpeg_quality, webp_quality)
+    except Exception as exc:  # Pillow raises many types on damaged files
+        result.update(status='error', error=str(exc))
+        return result
+    if optimized is None:
+        result['status'] = 'skipped'
+        return result
+    if len(optimized) > len(data) * (1 - min_saving):
+        return result
+
+    result.update(after=len(optimized), sha1=_sha1(optimized), status='optimized')
+    if not dry_run:
+        # Write next to the original and swap, so readers never see a partial file
+        temp_path = f'{path}.optimizing'
+        with open(temp_path, 'wb') as target:
+            target.write(optimized)
+        os.replace(temp_path, path)
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompress the images under MEDIA_ROOT in place and strip their metadata, in parallel. "
+        "Resumable: files already processed are recorded in a manifest of content hashes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Number of worker processes (default: CPU count).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report the projected savings; no file or manifest is written.")
+        parser.add_argument('--jpeg-quality', type=int, default=85,
+                            help="JPEG quality (default: 85).")
+        parser.add_argument('--webp-quality', type=int, default=85,
+                            help="WebP quality (default: 85).")
+        parser.add_argument('--min-saving', type=float, default=5,
+                            help="Only replace a file when it shrinks by at least this percentage (default: 5).")
+        parser.add_argument('--manifest', default=None,
+                            help=f"Manifest path (default: MEDIA_ROOT/{MANIFEST_NAME}).")
+
+    def handle(self, *args, **options):
+        media_root = str(settings.MEDIA_ROOT)
+        manifest_path = options['manifest'] or os.path.join(media_root, MANIFEST_NAME)
+        manifest = self.load_manifest(manifest_path)
+        dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+
+        pending, done = self.find_pending(media_root, manifest)
+        total_bytes = sum(os.path.getsize(path) for path in pending)
+        self.stdout.write(
+            f"{len(pending)} images to process ({total_bytes / 1e6:.1f} MB), {done} already done"
+            + (" [dry run]" if dry_run else "")
+        )
+        if not pending:
+            return
+
+        stats = {'optimized': 0, 'unchanged': 0, 'skipped': 0, 'error': 0, 'before': 0, 'after': 0}
+        workers = max(1, options['workers'])
+        started = time.monotonic()
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        _optimize, path, dry_run, options['jpeg_quality'], options['webp_quality'],
+                        options['min_saving'] / 100,
+                    )
+                    for path in pending
+                ]
+                for count, future in enumerate(as_completed(futures), start=1):
+                    result = future.result()
+                    self.record(result, stats, manifest, media_root)
+                    if not dry_run and count % MANIFEST_SAVE_EVERY == 0:
+                        self.save_manifest(manifest_path, manifest)
+        finally:
+            # Keep what was done so far, even when interrupted
+            if not dry_run:
+                self.save_manifest(manifest_path, manifest)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        processed = sum(stats[key] for key in ('optimized', 'unchanged', 'skipped', 'error'))
+        saved = stats['before'] - stats['after']
+        verb = "Would save" if dry_run else "Saved"
+        self.stdout.write(
+            f"Processed {processed} files in {elapsed:.1f}s with {workers} workers "
+            f"({processed / elapsed:.1f} files/s, {stats['before'] / 1e6 / elapsed:.2f} MB/s)."
+        )
+        self.stdout.write(
+            f"optimized={stats['optimized']} unchanged={stats['unchanged']} "
+            f"skipped={stats['skipped']} errors={stats['error']}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {saved / 1e6:.2f} MB of {stats['before'] / 1e6:.2f} MB "
+            f"({(saved / stats['before'] * 100) if stats['before'] else 0:.1f}%)."
+        ))
+
+    def find_pending(self, media_root, manifest):
+        pending, done = [], 0
+        for directory, dirnames, filenames in os.walk(media_root):
+            relative_dir = os.path.relpath(directory, media_root).replace(os.sep, '/')
+            dirnames[:] = sorted(
+                name for name in dirnames
+                if (name if relative_dir == '.' else f'{relative_dir}/{name}') not in GENERATED_DIRS
+            )
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() not in OPTIMIZABLE_EXTENSIONS:
+                    continue
+                path = os.path.join(directory, filename)
+                if self.is_done(path, manifest.get(os.path.relpath(path, media_root))):
+                    done += 1
+                else:
+                    pending.append(path)
+        return pending, done
+
+    @staticmethod
+    def is_done(path, entry):
+        if not entry:
+            return False
+        stat = os.stat(path)
+        if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+        if stat.st_size != entry['size']:
+            return False
+        # Same size but touched since (e.g. restored from a backup): compare contents
+        with open(path, 'rb') as source:
+            return _sha1(source.read()) == entry['sha1']
+
+    def record(self, result, stats, manifest, media_root):
+        stats[result['status']] += 1
+        stats['before'] += result['before']
+        stats['after'] += result['after']
+        relative = os.path.relpath(result['path'], media_root)
+        if result['status'] == 'error':
+            self.stderr.write(f"{relative}: {result['error']}")
+            return
+        if result['status'] == 'optimized' and self.verbosity > 1:
+            self.stdout.write(f"{relative}: {result['before']} -> {result['after']} bytes")
+        if os.path.exists(result['path']):
+            stat = os.stat(result['path'])
+            manifest[relative] = {'sha1': result['sha1'], 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    @staticmethod
+    def load_manifest(path):
+        try:
+            with open(path) as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def save_manifest(path, manifest):
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+        os.replace(temp_path, path)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog_main.routers import pin_to_primary
+from blogs.utils.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from all published blog posts."
+
+    def handle(self, *args, **options):
+        pin_to_primary()  # the index must match the posts on the primary
+        backend = get_search_backend()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} published posts with {backend.__class__.__name__}."
+        ))
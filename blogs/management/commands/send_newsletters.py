@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog_main.routers import pin_to_primary
+from blogs.utils.newsletter import newsletter_setting, process_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued newsletter emails from the outbox in chunks over one SMTP connection, "
+        "retrying failures with backoff. Runs until stopped unless --once is given. "
+        "Workers claim their chunks, so several can run at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Send everything that is currently due, then exit.")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Deliveries loaded and written back per chunk (default: NEWSLETTER_BATCH_SIZE).")
+        parser.add_argument('--rate', type=float, default=None,
+                            help="Maximum emails per second, 0 for no limit (default: NEWSLETTER_RATE_LIMIT).")
+        parser.add_argument('--max-attempts', type=int, default=None,
+                            help="Attempts before a delivery is marked failed (default: NEWSLETTER_MAX_ATTEMPTS).")
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help="Seconds to wait between checks for new work (default: NEWSLETTER_POLL_INTERVAL).")
+
+    def handle(self, *args, **options):
+        # A lagging replica could hand out deliveries an earlier run already sent
+        pin_to_primary()
+        poll_interval = options['poll_interval'] or newsletter_setting('POLL_INTERVAL', 10)
+
+        while True:
+            try:
+                attempted = process_outbox(
+                    batch_size=options['batch_size'],
+                    rate=options['rate'],
+                    max_attempts=options['max_attempts'],
+                )
+            except Exception as e:
+                # e.g. the SMTP server is unreachable; deliveries stay queued
+                self.stderr.write(self.style.ERROR(f"Newsletter worker error: {e}"))
+                attempted = 0
+            if attempted:
+                self.stdout.write(f"Attempted {attempted} newsletter deliveries.")
+            if options['once']:
+                break
+            try:
+                time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                break
+
+        self.stdout.write(self.style.SUCCESS("Newsletter worker stopped."))
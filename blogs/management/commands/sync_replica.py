@@ -0,0 +1,52 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog_main.routers import PRIMARY, replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over each SQLite replica in DATABASE_REPLICAS, "
+        "standing in for replication in a local two-file setup. Run it on a schedule with "
+        "--interval to simulate replication lag."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Keep copying every this many seconds (default: copy once).")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[PRIMARY]
+        targets = [alias for alias in replicas() if alias in settings.DATABASES]
+        if not targets:
+            raise CommandError("No replica configured; set DB_REPLICA_NAME or DATABASE_REPLICAS.")
+        for alias in [PRIMARY, *targets]:
+            if settings.DATABASES[alias]['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError(f"'{alias}' is not SQLite; use the database's own replication.")
+
+        while True:
+            started = time.monotonic()
+            for alias in targets:
+                self.copy(primary['NAME'], settings.DATABASES[alias]['NAME'])
+                connections[alias].close()
+            self.stdout.write(self.style.SUCCESS(
+                f"Copied {primary['NAME']} to {', '.join(targets)} in {time.monotonic() - started:.2f}s."
+            ))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
+
+    @staticmethod
+    def copy(source_name, target_name):
+        # The backup API copies a consistent snapshot while the site keeps writing
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(target_name)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_main.routers import pin_to_primary
+from blogs.utils.related import update_related_posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the related posts of saved and deleted posts, queued by the post signals, "
+        "in batches against the saved index. Runs until stopped unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Apply everything that is currently queued, then exit.")
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help="Queued posts applied per index load and save (default: 100).")
+        parser.add_argument('--poll-interval', type=float, default=10,
+                            help="Seconds to wait between checks for queued posts (default: 10).")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        pin_to_primary()  # the queue and the links are read to be written back
+
+        while True:
+            updated = 0
+            try:
+                while True:
+                    batch = update_related_posts(options['batch_size'])
+                    updated += batch
+                    if batch < options['batch_size']:
+                        break
+            except Exception as e:
+                # e.g. the index file is not writable; the queue is kept
+                self.stderr.write(self.style.ERROR(f"Related posts worker error: {e}"))
+            if updated:
+                self.stdout.write(f"Updated the related posts of {updated} posts.")
+            if options['once']:
+                break
+            try:
+                time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                break
+
+        self.stdout.write(self.style.SUCCESS("Related posts worker stopped."))
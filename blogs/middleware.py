@@ -1,14 +1,160 @@
 # middleware.py
-from blogs.utils.breadcrumbs import BreadcrumbBuilder
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from blog_main.routers import has_written, primary_pinning, replicas
+from blogs.utils.ad_slots import fill_ad_slots
+from blogs.utils.breadcrumbs import lazy_breadcrumbs
+from blogs.utils.page_cache import (
+    BASE_TAGS, CACHEABLE_ROUTES, PageCacheState, page_cache_key, strip_tracking_params,
+)
+from blogs.utils.profiling import install_template_timer, profile_request, request_stats
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class RequestProfilingMiddleware:
+    """
+    Records the query count, database time, template time and wall time of
+    every request that resolved to a view in the process-wide request_stats
+    buffer (see the dashboard performance page). Requests over the
+    PERFORMANCE_QUERY_BUDGET or PERFORMANCE_TIME_BUDGET_MS are logged to
+    the 'blogs.performance' logger. Put it first to time the whole stack.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFORMANCE_PROFILING_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with profile_request() as profile:
+            response = self.get_response(request)
+        total_time = time.perf_counter() - start
+
+        match = request.resolver_match
+        if match is not None:
+            request_stats.record(
+                match.view_name, request.method, request.path, response.status_code, profile, total_time,
+            )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes for DATABASE_REPLICAS: POSTs and other unsafe requests
+    read from the primary throughout, and when a request writes, the client
+    gets a cookie that keeps its reads on the primary for the next
+    REPLICA_PIN_SECONDS, until the replicas have caught up. Put it before
+    SessionMiddleware so session reads are pinned too.
+    """
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cookie_name = getattr(settings, 'REPLICA_PIN_COOKIE_NAME', 'primary_pin')
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+
+    def __call__(self, request):
+        pinned = request.method not in SAFE_METHODS or self.cookie_name in request.COOKIES
+        with primary_pinning(pinned):
+            response = self.get_response(request)
+            wrote = has_written()
+        if wrote:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=self.pin_seconds,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
+
 
 class BreadcrumbMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Only set auto breadcrumbs if not already set by view
+        # Only set auto breadcrumbs if not already set by view. They are built
+        # lazily, so views that assign request.breadcrumbs never pay for them.
         if not hasattr(request, 'breadcrumbs'):
-            request.breadcrumbs = BreadcrumbBuilder(request).auto_detect_from_url().build()
-        
+            request.breadcrumbs = lazy_breadcrumbs(request)
+
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Full-page cache for anonymous GETs of the routes in CACHEABLE_ROUTES.
+
+    Pages are stored with the versions of the tags they depend on; signals
+    bump those tags when posts, categories, legal pages or comments change,
+    which makes every affected copy stale at once. Ad slots are stored as
+    markers and filled on every response, so ads keep rotating and counting
+    impressions on cached pages.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PAGE_CACHE_ENABLED', True)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        state = getattr(request, 'page_cache', None)
+        if state is None:
+            return response
+        if state.hit:
+            response['X-Page-Cache'] = 'HIT'
+            return response
+
+        if self.is_storable(request, response):
+            state.store(response)
+            response['X-Page-Cache'] = 'MISS'
+        response.content = fill_ad_slots(response.content, response.charset)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.enabled or request.method != 'GET':
+            return None
+        route_tags = CACHEABLE_ROUTES.get(request.resolver_match.url_name)
+        if route_tags is None or request.user.is_authenticated:
+            return None
+
+        # Render (and store) the page as if tracking parameters were absent,
+        # so the copy is valid for every URL that maps to the same key
+        cleaned = strip_tracking_params(request.GET)
+        if cleaned is not None:
+            request.GET = cleaned
+            request.META['QUERY_STRING'] = cleaned.urlencode()
+
+        state = request.page_cache = PageCacheState(page_cache_key(request), BASE_TAGS + route_tags)
+        response = state.load()
+        if response is not None:
+            state.hit = True
+            # Stored validators are still current: a change would have made the copy stale
+            response = get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(response.get('Last-Modified')),
+                response=response,
+            )
+            if response.status_code == 200:
+                response.content = fill_ad_slots(response.content, response.charset)
+        return response
+
+    @staticmethod
+    def is_storable(request, response):
+        if response.status_code != 200 or response.streaming or response.cookies:
+            return False
+        cache_control = response.get('Cache-Control', '')
+        if 'private' in cache_control or 'no-store' in cache_control:
+            return False
+        # The view may have logged someone in or touched the session
+        return not request.user.is_authenticated
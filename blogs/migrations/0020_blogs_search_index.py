@@ -0,0 +1,40 @@
+from django.db import migrations
+
+from blogs.utils.html import html_to_text
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blogs_search_index USING fts5("
+        "title, short_description, body, tokenize = 'porter unicode61')"
+    )
+    Blogs = apps.get_model('blogs', 'Blogs')
+    rows = [
+        (post.pk, post.title, post.short_description, html_to_text(post.blog_body))
+        for post in Blogs.objects.filter(status='published').iterator()
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO blogs_search_index (rowid, title, short_description, body) "
+            "VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS blogs_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0019_socialmedia'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0020_blogs_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Reading Time (min)'),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Word Count'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0021_blogs_word_count_reading_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdStatHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('placement', models.CharField(choices=[('HEADER', 'Header'), ('SIDEBAR_TOP', 'Sidebar Top'), ('SIDEBAR_BOTTOM', 'Sidebar Bottom'), ('CONTENT_TOP', 'Content Top'), ('CONTENT_MIDDLE', 'Content Middle'), ('CONTENT_BOTTOM', 'Content Bottom'), ('CONTENT_VIDEO', 'Content Video'), ('FOOTER', 'Footer')], max_length=20)),
+                ('category_key', models.PositiveIntegerField(default=0, help_text='Category the ad was shown for (0 = no category)')),
+                ('hour', models.DateTimeField(help_text='Start of the hour (UTC)')),
+                ('impressions', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_stats', to='blogs.advertisement')),
+            ],
+            options={
+                'verbose_name': 'Hourly Ad Stat',
+                'verbose_name_plural': 'Hourly Ad Stats',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour', 'ad'], name='blogs_adsta_hour_b6cef4_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ad', 'placement', 'category_key', 'hour'), name='unique_ad_stat_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0023_newsletter_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsletterjob',
+            name='kind',
+            field=models.CharField(choices=[('CUSTOM', 'Custom Newsletter'), ('WELCOME', 'Welcome Email')], default='CUSTOM', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='newsletterjob',
+            name='text_body',
+            field=models.TextField(blank=True, help_text='Empty for welcome emails, which are rendered per recipient'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0024_newsletterjob_kind'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogs',
+            index=models.Index(fields=['status', 'updated_at'], name='blogs_blogs_status_ffdd33_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0025_blogs_status_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Image Renditions'),
+        ),
+    ]
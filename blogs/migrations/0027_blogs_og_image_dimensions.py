@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0026_blogs_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='og_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='OG Image Height'),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='og_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='OG Image Width'),
+        ),
+        migrations.AlterField(
+            model_name='blogs',
+            name='og_image',
+            field=models.ImageField(blank=True, help_text='Cropped to 1200×630px; defaults to the blog image', null=True, upload_to='og_images/%Y/%m/%d/', verbose_name='OG Image'),
+        ),
+    ]
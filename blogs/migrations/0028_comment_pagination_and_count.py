@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_comments(apps, schema_editor):
+    Blogs = apps.get_model('blogs', 'Blogs')
+    Comment = apps.get_model('blogs', 'Comment')
+    counts = (
+        Comment.objects.filter(blog=OuterRef('pk')).order_by()
+        .values('blog').annotate(total=Count('pk')).values('total')
+    )
+    Blogs.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0027_blogs_og_image_dimensions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Comments'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['blog', 'created_at'], name='blogs_comme_blog_id_7cfb75_idx'),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
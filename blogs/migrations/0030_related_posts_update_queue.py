@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0029_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPostsUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.PositiveIntegerField(unique=True)),
+                ('linked_from', models.JSONField(blank=True, default=list)),
+                ('queued_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Related Posts Update',
+                'verbose_name_plural': 'Related Posts Updates',
+            },
+        ),
+    ]
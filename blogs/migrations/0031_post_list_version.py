@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0030_related_posts_update_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostListVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Post List Version',
+                'verbose_name_plural': 'Post List Versions',
+            },
+        ),
+    ]
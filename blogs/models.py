@@ -1,5 +1,5 @@
 # blogs/models.py
-from django.db import models
+from django.db import models, transaction
 from tinymce.models import HTMLField  # Import the HTMLField
 from django.contrib.auth.models import User
 from django.utils.text import slugify
@@ -8,6 +8,7 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import re
+from .utils.html import html_to_text
 
 # ---------------------------------------
 # CONSTANTS
@@ -31,9 +32,19 @@ TWITTER_CARD_CHOICES = [
     ('summary_large_image', 'Summary Large Image'),
 ]
 
+WORDS_PER_MINUTE = 200
+
 # ---------------------------------------
 # CATEGORY MODEL
 # ---------------------------------------
+class CategoryQuerySet(models.QuerySet):
+    def with_post_count(self):
+        """Annotate each category with its published post count in a single query."""
+        return self.annotate(
+            published_post_count=models.Count('blogs', filter=models.Q(blogs__status=STATUS_PUBLISHED))
+        )
+
+
 class Category(models.Model):
     category_name = models.CharField(max_length=50, unique=True, verbose_name="Category Name")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
@@ -43,6 +54,8 @@ class Category(models.Model):
     meta_title = models.CharField(max_length=70, blank=True, verbose_name="Meta Title")
     meta_description = models.CharField(max_length=300, blank=True, verbose_name="Meta Description")
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
@@ -58,6 +71,9 @@ class Category(models.Model):
 
     @property
     def post_count(self):
+        # Use the value from with_post_count() when available to avoid a query per category
+        if hasattr(self, 'published_post_count'):
+            return self.published_post_count
         return self.blogs.filter(status=STATUS_PUBLISHED).count()
     
     def save(self, *args, **kwargs):
@@ -79,6 +95,22 @@ class Category(models.Model):
 # ---------------------------------------
 # BLOGS MODEL
 # ---------------------------------------
+class BlogsQuerySet(models.QuerySet):
+    # Columns listing cards never show; blog_body is the full article HTML
+    CARD_DEFERRED_FIELDS = ('blog_body',)
+
+    def published(self):
+        return self.filter(status=STATUS_PUBLISHED)
+
+    def cards(self):
+        """
+        Projection for listing cards (title, image, short description,
+        reading time, category, author): the article body stays in the
+        database and category/author come from the same query.
+        """
+        return self.select_related('category', 'author').defer(*self.CARD_DEFERRED_FIELDS)
+
+
 class Blogs(models.Model):
     # Basic info
     title = models.CharField(max_length=200, unique=True, verbose_name="Title")
@@ -102,7 +134,9 @@ class Blogs(models.Model):
     parent_blog = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='translations', help_text=_("Link to original post for translations"))
 
     # Social media (Open Graph)
-    og_image = models.ImageField(upload_to='og_images/%Y/%m/%d/', blank=True, null=True, verbose_name="OG Image", help_text="1200×630px recommended")
+    og_image = models.ImageField(upload_to='og_images/%Y/%m/%d/', blank=True, null=True, verbose_name="OG Image", help_text="Cropped to 1200×630px; defaults to the blog image")
+    og_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="OG Image Width")
+    og_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="OG Image Height")
     og_title = models.CharField(max_length=90, blank=True, verbose_name="OG Title")
     og_description = models.TextField(max_length=300, blank=True, verbose_name="OG Description")
 
@@ -117,10 +151,22 @@ class Blogs(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DRAFT, db_index=True, verbose_name="Status")
     is_featured = models.BooleanField(default=False, db_index=True, verbose_name="Featured")
 
+    # Denormalized reading stats (computed from blog_body in save())
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Word Count")
+    reading_time = models.PositiveIntegerField(default=1, editable=False, verbose_name="Reading Time (min)")
+
+    # Denormalized number of comments (kept up to date by blogs.signals)
+    comment_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Comments")
+
+    # Resized WebP/JPEG copies of blog_image and the source of the OG image (see blogs.utils.images)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Image Renditions")
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BlogsQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Blog Post'
         verbose_name_plural = 'Blog Posts'
@@ -129,6 +175,7 @@ class Blogs(models.Model):
             models.Index(fields=['status', 'is_featured', 'created_at']),
             models.Index(fields=['slug', 'status']),
             models.Index(fields=['category', 'status', 'created_at']),
+            models.Index(fields=['status', 'updated_at']),
         ]
         permissions = [
             ("can_publish", "Can publish blog post"),
@@ -163,11 +210,104 @@ class Blogs(models.Model):
             self.og_title = self.meta_title
         if not self.og_description:
             self.og_description = self.meta_description
-        if not self.og_image and self.blog_image:
-            self.og_image = self.blog_image
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'blog_body' in update_fields:
+            self.update_reading_stats()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'word_count', 'reading_time'}
+
+        if update_fields is None or set(update_fields) & set(self.IMAGE_FIELDS):
+            changed = self.refresh_og_image()
+            changed = self.refresh_image_renditions() or changed
+            if changed and update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {
+                    'og_image', 'og_image_width', 'og_image_height', 'image_renditions',
+                }
         
         super().save(*args, **kwargs)
 
+    def update_reading_stats(self):
+        """Recompute word_count and reading_time from the HTML body."""
+        self.word_count = len(html_to_text(self.blog_body).split())
+        self.reading_time = max(1, round(self.word_count / WORDS_PER_MINUTE))
+
+    IMAGE_FIELDS = ('blog_image', 'og_image')
+    # og_image is already a single optimized 1200×630 file
+    RENDITION_FIELDS = ('blog_image',)
+
+    def _commit_image(self, field_name):
+        file = getattr(self, field_name)
+        if file and not file._committed:
+            # Store the upload now (the field would do it on save) so it can be resized
+            file.save(file.name, file.file, save=False)
+        return file
+
+    def refresh_image_renditions(self):
+        """Rebuild the renditions of every image field whose file changed. Returns True if any did."""
+        from .utils.images import build_renditions
+
+        renditions = dict(self.image_renditions or {})
+        changed = False
+        for field_name in self.RENDITION_FIELDS:
+            file = self._commit_image(field_name)
+            if not file:
+                changed |= renditions.pop(field_name, None) is not None
+                continue
+            if renditions.get(field_name, {}).get('source') == file.name:
+                continue
+            renditions[field_name] = build_renditions(file.name, file.storage)
+            changed = True
+        self.image_renditions = renditions
+        return changed
+
+    def refresh_og_image(self):
+        """
+        Point og_image at a 1200×630 crop of the uploaded OG image, or of
+        blog_image when none was uploaded. image_renditions['og'] remembers
+        the source, so the crop is only redone when the source changes, and
+        a crop of an OG upload is kept when the post is saved again.
+        Returns True if og_image changed.
+        """
+        from .utils.images import build_og_image, is_generated_og_image
+
+        og_image = self._commit_image('og_image')
+        blog_image = self._commit_image('blog_image')
+        renditions = dict(self.image_renditions or {})
+        state = renditions.get('og') or {}
+        custom = bool(og_image) and not is_generated_og_image(og_image.name)
+        # Older rows did not record 'custom': OG uploads have their own directory
+        cropped_upload = state.get('custom', str(state.get('source', '')).startswith('og_images/'))
+        if not custom and og_image and og_image.name == state.get('image') and cropped_upload:
+            # og_image is the crop of an earlier OG upload, which stays the source
+            return False
+        source = og_image if custom else blog_image
+
+        if not source:
+            if not og_image:
+                return False
+            # The blog image it was generated from was removed
+            self.og_image = None
+            self.og_image_width = self.og_image_height = None
+            renditions.pop('og', None)
+            self.image_renditions = renditions
+            return True
+
+        if state.get('source') == source.name and og_image and og_image.name == state.get('image'):
+            return False
+
+        result = build_og_image(source.name, source.storage)
+        if result is None:
+            # Not an image Pillow can read: use the file as it is
+            name, width, height = source.name, None, None
+        else:
+            name, width, height = result
+        self.og_image = name
+        self.og_image_width, self.og_image_height = width, height
+        renditions['og'] = {'source': source.name, 'image': name, 'custom': custom}
+        self.image_renditions = renditions
+        return True
+
     def get_absolute_url(self):
         if self.pk and self.slug:
             return reverse('blog_detail', kwargs={'slug': self.slug})
@@ -180,19 +320,75 @@ class Blogs(models.Model):
         return self.get_absolute_url()
 
     def get_related_posts(self, limit=3):
-        return Blogs.objects.filter(
-            category=self.category, status=STATUS_PUBLISHED
+        """
+        Most similar published posts, from the neighbours precomputed by
+        blogs.utils.related (one lookup on the (post, rank) index). Until
+        those exist, the newest posts of the same category.
+        """
+        related = list(
+            Blogs.objects.published().cards()
+            .filter(related_from__post=self).order_by('related_from__rank')[:limit]
+        )
+        if related:
+            return related
+        return Blogs.objects.published().cards().filter(
+            category=self.category
         ).exclude(id=self.id).order_by('-created_at')[:limit]
 
     @property
     def estimated_reading_time(self):
-        # Update this method to handle HTML content properly
-        # Remove HTML tags for accurate word count
-        import re
-        clean_text = re.sub('<[^<]+?>', '', self.blog_body)
-        word_count = len(clean_text.split())
-        words_per_minute = 200
-        return max(1, round(word_count / words_per_minute))
+        # Precomputed in save(); see update_reading_stats()
+        return self.reading_time
+
+class RelatedPost(models.Model):
+    """Precomputed nearest neighbours of a post by TF-IDF similarity (see blogs.utils.related)."""
+    post = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='related_from')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Related Post'
+        verbose_name_plural = 'Related Posts'
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='unique_related_post_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class RelatedPostsUpdate(models.Model):
+    """A saved or deleted post whose related posts the update_related_posts worker has yet to refresh."""
+    # Not a foreign key: deleted posts are queued too
+    post_id = models.PositiveIntegerField(unique=True)
+    # Posts that listed it when it was deleted (their links are gone with it)
+    linked_from = models.JSONField(default=list, blank=True)
+    queued_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Related Posts Update'
+        verbose_name_plural = 'Related Posts Updates'
+
+    def __str__(self):
+        return f"Post {self.post_id} (queued {self.queued_at:%Y-%m-%d %H:%M})"
+
+
+class PostListVersion(models.Model):
+    """
+    A single row, bumped whenever a post is saved or deleted. The keyset
+    page boundaries cached by each process are keyed by it, so every
+    process sees the change at once, whatever the cache backend.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Post List Version'
+        verbose_name_plural = 'Post List Versions'
+
+    def __str__(self):
+        return f"Post list version {self.version}"
 
 # ---------------------------------------
 # COMMENT MODEL
@@ -204,9 +400,19 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [models.Index(fields=['blog', 'created_at'])]
+
     def __str__(self):
         return f"{self.user} - {self.comment[:40]}"
 
+    def save(self, *args, **kwargs):
+        # Blogs.comment_count is incremented by a post_save handler; the
+        # transaction makes the comment and the new count commit together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 # ---------------------------------------
 # ADVERTISEMENT MODEL
 class Advertisement(models.Model):
@@ -297,6 +503,33 @@ class Advertisement(models.Model):
             return True
         return self.target_categories.filter(id=category_id).exists()
 
+
+class AdStatHourly(models.Model):
+    """Impressions and clicks per ad, placement, category and hour, written in batches by the ad counter buffer."""
+    ad = models.ForeignKey(Advertisement, on_delete=models.CASCADE, related_name='hourly_stats')
+    placement = models.CharField(max_length=20, choices=Advertisement.PLACEMENT_CHOICES)
+    category_key = models.PositiveIntegerField(
+        default=0,
+        help_text="Category the ad was shown for (0 = no category)"
+    )
+    hour = models.DateTimeField(help_text="Start of the hour (UTC)")
+    impressions = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Hourly Ad Stat"
+        verbose_name_plural = "Hourly Ad Stats"
+        ordering = ['-hour']
+        constraints = [
+            models.UniqueConstraint(fields=['ad', 'placement', 'category_key', 'hour'], name='unique_ad_stat_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['hour', 'ad']),
+        ]
+
+    def __str__(self):
+        return f"{self.ad_id} {self.placement} @ {self.hour:%Y-%m-%d %H:00}"
+
 # LEGAL PAGES, CONTACT, WRITE-FOR-US
 # ---------------------------------------
 class LegalPage(models.Model):
@@ -365,7 +598,94 @@ class NewsletterSubscriber(models.Model):
 
     def __str__(self):
         return self.email
-    
+
+
+# ---------------------------------------
+# NEWSLETTER OUTBOX
+# ---------------------------------------
+class NewsletterJob(models.Model):
+    """One newsletter send; its recipients are queued as NewsletterDelivery rows for the send_newsletters worker."""
+    KIND_CUSTOM = 'CUSTOM'
+    KIND_WELCOME = 'WELCOME'
+    KIND_CHOICES = [
+        (KIND_CUSTOM, 'Custom Newsletter'),
+        (KIND_WELCOME, 'Welcome Email'),
+    ]
+
+    STATUS_QUEUED = 'QUEUED'
+    STATUS_SENDING = 'SENDING'
+    STATUS_DONE = 'DONE'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_DONE, 'Done'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_CUSTOM)
+    subject = models.CharField(max_length=200)
+    text_body = models.TextField(blank=True, help_text="Empty for welcome emails, which are rendered per recipient")
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    total_count = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Newsletter Job"
+        verbose_name_plural = "Newsletter Jobs"
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+
+    @property
+    def pending_count(self):
+        return max(self.total_count - self.sent_count - self.failed_count, 0)
+
+    @property
+    def progress(self):
+        """Percentage of recipients that have been sent to or given up on."""
+        if not self.total_count:
+            return 100
+        return int((self.sent_count + self.failed_count) * 100 / self.total_count)
+
+
+class NewsletterDelivery(models.Model):
+    STATUS_PENDING = 'PENDING'
+    STATUS_SENT = 'SENT'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    job = models.ForeignKey(NewsletterJob, on_delete=models.CASCADE, related_name='deliveries')
+    email = models.EmailField()
+    name = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Newsletter Delivery"
+        verbose_name_plural = "Newsletter Deliveries"
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'email'], name='unique_newsletter_delivery'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.get_status_display()})"
+
+
 class SocialMedia(models.Model):
     PLATFORM_CHOICES = [
         ('facebook', 'Facebook'),
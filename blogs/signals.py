@@ -0,0 +1,171 @@
+# blogs/signals.py
+from django.core.signals import request_finished
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed, pre_migrate
+from django.dispatch import receiver
+
+from blog_main.routers import pin_to_primary
+
+from .models import Blogs, Category, Comment, LegalPage, SocialMedia, Advertisement, RelatedPost, STATUS_PUBLISHED
+from .utils.ad_counters import ad_counters
+from .utils.ad_engine import invalidate_ad_index
+from .utils.newsletter import invalidate_latest_posts
+from .utils.page_cache import bump_page_cache_tags
+from .utils.pagination import invalidate_page_boundaries
+from .utils.related import queue_related_posts_update
+from .utils.search import get_search_backend
+from .utils.site_cache import invalidate_categories, invalidate_social_media_links
+
+
+# ---------------------------------------
+# SEARCH INDEX
+# ---------------------------------------
+@receiver(post_save, sender=Blogs)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Re-index a post whenever it is saved (drafts are removed from the index)."""
+    if raw:
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Blogs)
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+# ---------------------------------------
+# SITE CACHE
+# ---------------------------------------
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Blogs)
+@receiver(post_delete, sender=Blogs)
+def clear_cached_categories(sender, **kwargs):
+    """Category names and published post counts are cached site-wide."""
+    invalidate_categories()
+
+
+@receiver(post_save, sender=Blogs)
+@receiver(post_delete, sender=Blogs)
+def clear_cached_latest_posts(sender, **kwargs):
+    """The welcome email's "Latest Articles" block is pre-rendered and cached."""
+    invalidate_latest_posts()
+
+
+@receiver(post_save, sender=SocialMedia)
+@receiver(post_delete, sender=SocialMedia)
+def clear_cached_social_media_links(sender, **kwargs):
+    invalidate_social_media_links()
+
+
+@receiver(post_save, sender=Blogs)
+@receiver(post_delete, sender=Blogs)
+def clear_page_boundaries(sender, **kwargs):
+    """Keyset page boundaries of the post listings (drafts included, for the dashboard)."""
+    invalidate_page_boundaries()
+
+
+# ---------------------------------------
+# COMMENT COUNTS
+# ---------------------------------------
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    # Runs inside Comment.save()'s transaction
+    if created and not raw:
+        Blogs.objects.filter(pk=instance.blog_id).update(comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    # Runs inside the deletion's transaction (also for bulk and cascading deletes)
+    Blogs.objects.filter(pk=instance.blog_id, comment_count__gt=0).update(comment_count=F('comment_count') - 1)
+
+
+# ---------------------------------------
+# AD INDEX
+# ---------------------------------------
+@receiver(post_save, sender=Advertisement)
+@receiver(post_delete, sender=Advertisement)
+@receiver(m2m_changed, sender=Advertisement.target_categories.through)
+def clear_ad_index(sender, **kwargs):
+    """Rebuild the in-memory ad index on the next ad slot render."""
+    invalidate_ad_index()
+
+
+# ---------------------------------------
+# AD COUNTERS
+# ---------------------------------------
+@receiver(request_finished, dispatch_uid='blogs.flush_ad_counters')
+def flush_ad_counters_after_request(sender, **kwargs):
+    """Write buffered impressions/clicks once the response is sent, if the flush interval or threshold is reached."""
+    ad_counters.maybe_flush()
+
+
+# ---------------------------------------
+# PAGE CACHE
+# ---------------------------------------
+@receiver(pre_save, sender=Blogs)
+def remember_published_state(sender, instance, raw=False, **kwargs):
+    """Note whether a post being saved as a draft was public before, so unpublishing invalidates pages too."""
+    if raw or not instance.pk or instance.status == STATUS_PUBLISHED:
+        return
+    instance._was_published = Blogs.objects.filter(pk=instance.pk, status=STATUS_PUBLISHED).exists()
+
+
+@receiver(post_save, sender=Blogs)
+@receiver(post_delete, sender=Blogs)
+def invalidate_post_pages(sender, instance, **kwargs):
+    # Draft edits are invisible to anonymous visitors and leave the cache alone
+    if instance.status == STATUS_PUBLISHED or getattr(instance, '_was_published', False):
+        bump_page_cache_tags('posts', f'blog:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    bump_page_cache_tags(f'blog:{instance.blog_id}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, **kwargs):
+    bump_page_cache_tags('categories')
+
+
+@receiver(post_save, sender=LegalPage)
+@receiver(post_delete, sender=LegalPage)
+def invalidate_legal_page(sender, instance, **kwargs):
+    bump_page_cache_tags('legal', f'legal:{instance.page_type}')
+
+
+@receiver(post_save, sender=SocialMedia)
+@receiver(post_delete, sender=SocialMedia)
+def invalidate_social_links(sender, **kwargs):
+    bump_page_cache_tags('social')
+
+# ---------------------------------------
+# RELATED POSTS
+# ---------------------------------------
+@receiver(pre_delete, sender=Blogs)
+def remember_related_links(sender, instance, **kwargs):
+    """The links to a deleted post cascade away with it; keep whose lists need refilling."""
+    instance._linked_from = list(
+        RelatedPost.objects.filter(related_id=instance.pk).values_list('post_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Blogs)
+@receiver(post_delete, sender=Blogs)
+def refresh_related_posts(sender, instance, raw=False, **kwargs):
+    if raw or not (instance.status == STATUS_PUBLISHED or getattr(instance, '_was_published', False)):
+        return
+    # In the same transaction as the save, so a rolled back post is never queued
+    queue_related_posts_update(instance.pk, getattr(instance, '_linked_from', ()))
+
+# ---------------------------------------
+# DATABASE ROUTING
+# ---------------------------------------
+@receiver(pre_migrate, dispatch_uid='blogs.pin_migrations_to_primary')
+def pin_migrations_to_primary(sender, **kwargs):
+    """Data migrations read what the schema migrations just wrote; the replicas do not have it yet."""
+    pin_to_primary()
@@ -1,8 +1,7 @@
 # blogs/templatetags/ads_extras.py
 from django import template
-from django.db.models import Q
-from blogs.models import Advertisement
-from django.utils import timezone
+from blogs.utils.ad_counters import record_impressions
+from blogs.utils.ad_engine import get_ad_index
 from django.utils.safestring import mark_safe
 
 register = template.Library()
@@ -13,28 +12,15 @@ def get_ad(placement, category_id):
     Fetches and returns ad content for the specified placement and category.
     Returns empty string if no ads found.
     """
-    now = timezone.now()
-    
     try:
-        # Get active ads for this placement
-        ads = Advertisement.objects.filter(
-            is_active=True,
-            placement_area=placement,
-            start_date__lte=now,
-            end_date__gte=now
-        )
+        # Highest priority live ad for this placement/category, from the in-memory index
+        ads = get_ad_index().eligible(placement, category_id)
         
-        # Filter for category targeting
-        filtered_ads = ads.filter(
-            Q(target_categories__id=category_id) | Q(target_categories__isnull=True)
-        ).distinct().order_by('-priority')
-        
-        if filtered_ads.exists():
-            ad = filtered_ads.first()
+        if ads:
+            ad = ads[0].ad
             
             # Track impression
-            ad.impressions += 1
-            ad.save()
+            record_impressions([ad], placement, category_id)
             
             return mark_safe(ad.ad_code)
         else:
@@ -1,6 +1,6 @@
 # blogs/templatetags/breadcrumb_tags.py
 from django import template
-from blogs.utils.breadcrumbs import BreadcrumbBuilder
+from blogs.utils.breadcrumbs import get_request_breadcrumbs
 
 register = template.Library()
 
@@ -10,6 +10,6 @@ def get_breadcrumbs(context):
     Returns breadcrumbs for the current request.
     Usage: {% get_breadcrumbs as breadcrumbs %}
     """
-    request = context['request']
-    builder = BreadcrumbBuilder(request)
-    return builder.auto_detect_from_url().build()
+    if 'breadcrumbs' in context:
+        return context['breadcrumbs']
+    return get_request_breadcrumbs(context['request'])
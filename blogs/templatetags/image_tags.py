@@ -0,0 +1,73 @@
+# blogs/templatetags/image_tags.py
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from blogs.utils.images import FORMATS, pick_rendition
+
+register = template.Library()
+
+
+def _renditions(obj, field_name):
+    file = getattr(obj, field_name, None)
+    if not file:
+        return None, {}
+    entry = (getattr(obj, 'image_renditions', None) or {}).get(field_name) or {}
+    if entry.get('source') != file.name:
+        # Renditions are missing or belong to a previous upload
+        entry = {}
+    return file, entry
+
+
+def _srcset(storage, candidates):
+    return ', '.join(f'{storage.url(name)} {width}w' for width, name in candidates)
+
+
+@register.simple_tag
+def responsive_image(obj, field_name, width, sizes=None, **attrs):
+    """
+    <picture> for an image field with WebP and JPEG renditions in srcset, so
+    the browser downloads a file close to the displayed size instead of the
+    original upload.
+    Usage: {% responsive_image post 'blog_image' 400 alt=post.title class='card-img-top' %}
+
+    `width` is the displayed width in CSS pixels; it picks the fallback src
+    (at 2x for high-density screens) and is the default `sizes`.
+    """
+    file, entry = _renditions(obj, field_name)
+    if file is None:
+        return ''
+
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    if not entry.get('jpeg'):
+        return format_html('<img src="{}"{}>', file.url, flatatt(attrs))
+
+    storage = file.storage
+    sizes = sizes or f'{width}px'
+    attrs.update(width=entry['width'], height=entry['height'])
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((FORMATS[fmt][2], _srcset(storage, entry[fmt]), sizes) for fmt in FORMATS if fmt != 'jpeg' and entry.get(fmt)),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        sources,
+        storage.url(pick_rendition(entry, 'jpeg', width * 2)),
+        _srcset(storage, entry['jpeg']),
+        sizes,
+        flatatt(attrs),
+    )
+
+
+@register.simple_tag
+def image_rendition_url(obj, field_name, width, fmt='jpeg'):
+    """
+    URL of the smallest rendition at least `width` pixels wide, or of the
+    original upload when there are no renditions (CSS backgrounds, meta tags).
+    """
+    file, entry = _renditions(obj, field_name)
+    if file is None:
+        return ''
+    name = pick_rendition(entry, fmt, width)
+    return file.storage.url(name) if name else file.url
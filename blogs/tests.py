@@ -1,3 +1,569 @@
-from django.test import TestCase
+import contextvars
+import io
+import itertools
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from blog_main.routers import PrimaryReplicaRouter, is_pinned, primary_pinning
+
+from .middleware import ReplicaPinningMiddleware
+from .models import (
+    STATUS_PUBLISHED, Advertisement, Blogs, Category, Comment, NewsletterDelivery, NewsletterJob, RelatedPost,
+    RelatedPostsUpdate, SocialMedia,
+)
+from .utils.ad_engine import AdIndex
+from .utils.benchmark import reset_process_caches
+from .utils.newsletter import claim_deliveries, enqueue_newsletter, process_outbox, retry_delay
+from .utils.pagination import KeysetPaginator
+from .utils.profiling import request_stats
+from .utils.related import RelatedIndex, rebuild_related_posts, update_related_posts
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, DATABASE_REPLICAS=[])
+class QueryBudgetTestCase(TestCase):
+    """
+    Asserts that a view runs a bounded number of SQL queries, and the same
+    number however much data exists: the page is rendered once, then again
+    after each call to grow() has added more categories, posts, comments,
+    ads and users. A query per row shows up as a count that changes.
+
+    Every request starts from cold process caches (site cache, ad index,
+    cached pages), so the budgets cover what a cache miss costs. Queries
+    all go to the primary, even where read replicas are configured.
+    """
+
+    GROWTH_STEPS = 2
+
+    _counter = itertools.count()
+
+    def setUp(self):
+        reset_process_caches()
+        request_stats.clear()
+        self.author = User.objects.create_superuser('author', 'author@example.com', 'password')
+        self.category = self.make_category()
+        self.post = self.make_post(self.category)
+
+    def tearDown(self):
+        reset_process_caches()
+
+    def make_category(self):
+        return Category.objects.create(category_name=f'Category {next(self._counter)}')
+
+    def make_post(self, category, author=None):
+        number = next(self._counter)
+        return Blogs.objects.create(
+            title=f'Python post {number}',
+            category=category,
+            author=author or self.author,
+            short_description='A python post',
+            blog_body='<p>Python and Django, ' + 'words ' * 200 + '</p>',
+            status=STATUS_PUBLISHED,
+            is_featured=number % 3 == 0,
+        )
+
+    def grow(self):
+        """Add a little of everything a page could query per row."""
+        reader = User.objects.create_user(f'reader{next(self._counter)}', password='password')
+        categories = [self.category] + [self.make_category() for _ in range(3)]
+        for category in categories:
+            for _ in range(2):
+                self.make_post(category, author=self.author)
+        for post in Blogs.objects.all():
+            Comment.objects.create(user=reader, blog=post, comment='Nice post')
+        for placement, _label in Advertisement.PLACEMENT_CHOICES:
+            ad = Advertisement.objects.create(
+                name=f'Ad {next(self._counter)}', placement_area=placement, ad_code='<b>ad</b>',
+                display_strategy='CATEGORY_MATCH',
+            )
+            ad.target_categories.set(categories[:2])
+        platform = SocialMedia.PLATFORM_CHOICES[next(self._counter) % len(SocialMedia.PLATFORM_CHOICES)][0]
+        SocialMedia.objects.get_or_create(platform=platform, defaults={'url': f'https://{platform}.example.com/x'})
+
+    def count_queries(self, url):
+        reset_process_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, f"GET {url}")
+        return len(queries)
+
+    def assertQueryBudget(self, url, budget):
+        # Some queries (prefetches, ad targeting) only run once there are rows
+        self.grow()
+        counts = [self.count_queries(url)]
+        for _ in range(self.GROWTH_STEPS):
+            self.grow()
+            counts.append(self.count_queries(url))
+        self.assertEqual(len(set(counts)), 1, f"GET {url} runs more queries as data grows: {counts}")
+        self.assertLessEqual(counts[0], budget, f"GET {url} runs {counts[0]} queries, budget is {budget}")
+
+
+class PublicViewQueryBudgetTests(QueryBudgetTestCase):
+
+    def test_home(self):
+        self.assertQueryBudget(reverse('home'), 10)
+
+    def test_home_second_page(self):
+        for _ in range(5):
+            self.grow()
+        self.assertQueryBudget(f"{reverse('home')}?page=2", 10)
+
+    def test_blog_detail(self):
+        self.assertQueryBudget(reverse('blog_detail', args=[self.post.slug]), 9)
+
+    def test_blog_comments(self):
+        self.assertQueryBudget(reverse('blog_comments', args=[self.post.slug]), 2)
+
+    def test_search(self):
+        self.assertQueryBudget(f"{reverse('search')}?keyword=python", 6)
+
+    def test_posts_by_category(self):
+        self.assertQueryBudget(reverse('posts_by_category', args=[self.category.pk]), 7)
+
+    def test_blog_list(self):
+        self.assertQueryBudget(reverse('blog_list'), 7)
+
+    def test_category_list(self):
+        self.assertQueryBudget(reverse('category_list'), 4)
+
+
+class AuthenticatedPublicViewQueryBudgetTests(QueryBudgetTestCase):
+    """Logged-in visitors bypass the page cache and load their session and user."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.author)
+
+    def test_home(self):
+        self.assertQueryBudget(reverse('home'), 12)
+
+    def test_blog_detail(self):
+        self.assertQueryBudget(reverse('blog_detail', args=[self.post.slug]), 11)
+
+
+class PageCacheQueryBudgetTests(QueryBudgetTestCase):
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_cached_pages_run_no_queries(self):
+        self.grow()
+        for url in (reverse('home'), reverse('blog_detail', args=[self.post.slug]),
+                    reverse('posts_by_category', args=[self.category.pk])):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response['X-Page-Cache'], 'HIT', url)
+
+
+@override_settings(PERFORMANCE_QUERY_BUDGET=10, PERFORMANCE_TIME_BUDGET_MS=500, PERFORMANCE_BUFFER_SIZE=100)
+class RequestStatsTests(SimpleTestCase):
+
+    def setUp(self):
+        request_stats.clear()
+        self.addCleanup(request_stats.clear)
+
+    def record(self, queries=1, total_time=0.01):
+        profile = SimpleNamespace(queries=queries, db_time=0.001, template_time=0.002)
+        return request_stats.record('home', 'GET', '/', 200, profile, total_time)
+
+    def test_budgets_are_read_from_settings(self):
+        self.assertFalse(self.record(queries=5)['slow'])
+        with override_settings(PERFORMANCE_QUERY_BUDGET=4), self.assertLogs('blogs.performance', 'WARNING'):
+            self.assertTrue(self.record(queries=5)['slow'])
+        with override_settings(PERFORMANCE_TIME_BUDGET_MS=5), self.assertLogs('blogs.performance', 'WARNING'):
+            self.assertTrue(self.record(total_time=0.01)['slow'])
+
+    @override_settings(PERFORMANCE_BUFFER_SIZE=2)
+    def test_buffer_size_is_read_from_settings(self):
+        for queries in (1, 2, 3):
+            self.record(queries=queries)
+        self.assertEqual([entry['queries'] for entry in request_stats.records()], [2, 3])
+
+
+@override_settings(COMMENTS_PAGE_SIZE=2)
+class AdIndexTests(TestCase):
+
+    def setUp(self):
+        self.placement = Advertisement.PLACEMENT_CHOICES[0][0]
+        for i in range(3):
+            Advertisement.objects.create(
+                name=f'Ad {i}', placement_area=self.placement, ad_code='<b>ad</b>', display_strategy='SEQUENTIAL',
+            )
+        self.index = AdIndex.build()
+
+    def test_concurrent_selections_are_all_counted_and_rotate(self):
+        def show(times):
+            for _ in range(times):
+                self.index.select(self.index.eligible(self.placement))
+
+        # Switch threads as often as possible, to interleave the selections
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        threads = [threading.Thread(target=show, args=(300,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(self.index.shown.values()), 8 * 300)
+        self.assertEqual(sorted(self.index.shown.values()), [800, 800, 800])
+
+
+class CommentPaginationTests(QueryBudgetTestCase):
+
+    def comments_url(self, cursor=None):
+        url = reverse('blog_comments', args=[self.post.slug])
+        return f'{url}?cursor={cursor}' if cursor else url
+
+    def test_pages_cover_comments_with_equal_timestamps_once(self):
+        reader = User.objects.create_user('reader', password='password')
+        for i in range(5):
+            Comment.objects.create(user=reader, blog=self.post, comment=f'Comment {i}')
+        # Same created_at: only the id tie-break orders them
+        Comment.objects.filter(blog=self.post).update(created_at=timezone.now())
+
+        seen, cursor = [], None
+        for _ in range(5):
+            data = self.client.get(self.comments_url(cursor)).json()
+            seen += [comment['id'] for comment in data['comments']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        expected = list(Comment.objects.filter(blog=self.post).order_by('-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in ('garbage', '123', '12-x'):
+            response = self.client.get(self.comments_url(cursor))
+            self.assertEqual(response.status_code, 400, cursor)
+
+
+class KeysetPaginatorTests(QueryBudgetTestCase):
+
+    def listing(self):
+        return KeysetPaginator(Blogs.objects.published(), 2, cache_key='test')
+
+    def first_rows(self):
+        return [self.listing().page(number).object_list[0] for number in (1, 2, 3)]
+
+    def in_another_worker(self):
+        """Runs the block against another process's local memory caches."""
+        return override_settings(CACHES={
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'other-{alias}'}
+            for alias in ('default', 'pages')
+        })
+
+    def test_cached_boundaries_follow_changes_made_by_other_workers(self):
+        posts = [self.make_post(self.category) for _ in range(5)][::-1]
+        self.assertEqual(self.first_rows(), [posts[0], posts[2], posts[4]])
+
+        with self.in_another_worker():
+            newest = self.make_post(self.category)
+        self.assertEqual(self.first_rows(), [newest, posts[1], posts[3]])
+
+        with self.in_another_worker():
+            posts[1].delete()
+        self.assertEqual(self.first_rows(), [newest, posts[2], posts[4]])
+
+
+class RelatedPostsTests(TestCase):
+
+    def setUp(self):
+        reset_process_caches()
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        index = override_settings(RELATED_POSTS_INDEX_PATH=os.path.join(workdir, 'related.npz'))
+        index.enable()
+        self.addCleanup(index.disable)
+        self.author = User.objects.create_user('author', password='password')
+        self.category = Category.objects.create(category_name='Notes')
+        self.orm = self.make_post('Django ORM queries', 'Python Django ORM querysets, joins and database indexes.')
+        self.views = self.make_post('Django views', 'Python Django views, templates and database queries.')
+        self.indexes = self.make_post('Database indexes', 'SQL database indexes and ORM query plans.')
+        self.roses = self.make_post('Growing roses', 'Garden roses need sun, compost and careful pruning.')
+        rebuild_related_posts()
+
+    def make_post(self, title, body):
+        return Blogs.objects.create(
+            title=title, category=self.category, author=self.author,
+            short_description=title, blog_body=f'<p>{body}</p>', status=STATUS_PUBLISHED,
+        )
+
+    def related(self, post):
+        return list(RelatedPost.objects.filter(post=post).values_list('related_id', flat=True))
+
+    def test_neighbours_are_ranked_by_similarity(self):
+        self.assertEqual(self.related(self.views)[0], self.orm.pk)
+        self.assertEqual(self.related(self.indexes)[0], self.orm.pk)
+        # Shares no words with the others
+        for post in (self.orm, self.views, self.indexes):
+            self.assertNotIn(self.roses.pk, self.related(post))
+
+    def test_saves_are_queued_for_the_worker(self):
+        with mock.patch.object(RelatedIndex, 'save') as save:
+            post = self.make_post('Django migrations', 'Python Django ORM migrations and database schema.')
+        save.assert_not_called()
+        self.assertTrue(RelatedPostsUpdate.objects.filter(post_id=post.pk).exists())
+
+    def test_incremental_insert_and_delete(self):
+        migrations = self.make_post('Django ORM migrations', 'Python Django ORM migrations, database indexes.')
+        self.assertEqual(update_related_posts(), 1)
+        self.assertEqual(self.related(migrations)[0], self.orm.pk)
+        self.assertIn(migrations.pk, self.related(self.orm)[:2])
+
+        self.views.delete()
+        self.assertEqual(update_related_posts(), 1)
+        self.assertFalse(RelatedPostsUpdate.objects.exists())
+        self.assertEqual(self.related(self.orm)[0], migrations.pk)
+        self.assertNotIn(self.views.pk, self.related(migrations))
+
+    def test_a_failed_update_keeps_the_queue(self):
+        self.make_post('Django migrations', 'Python Django ORM migrations and database schema.')
+        stderr = io.StringIO()
+        with mock.patch.object(RelatedIndex, 'save', side_effect=OSError("Read-only file system")):
+            call_command('update_related_posts', once=True, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn('Read-only file system', stderr.getvalue())
+        self.assertEqual(RelatedPostsUpdate.objects.count(), 1)
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    """The locmem backend, refusing the addresses in `rejected` and stopping the worker at `interrupt`."""
+
+    rejected = set()
+    interrupt = None
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.interrupt in message.to:
+                raise KeyboardInterrupt
+            if self.rejected & set(message.to):
+                raise OSError(f"Recipient refused: {message.to[0]}")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='blogs.tests.FlakyEmailBackend', NEWSLETTER_RETRY_BACKOFF=60, NEWSLETTER_MAX_ATTEMPTS=3,
+)
+class NewsletterOutboxTests(TestCase):
+
+    def setUp(self):
+        FlakyEmailBackend.rejected, FlakyEmailBackend.interrupt = set(), None
+        # Failed deliveries are logged as warnings
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.job = enqueue_newsletter(
+            'News', 'Text', '<p>HTML</p>', [(f'reader{i}@example.com', f'Reader {i}') for i in range(3)],
+        )
+
+    def delivery(self, email):
+        return NewsletterDelivery.objects.get(job=self.job, email=email)
+
+    def make_due(self):
+        NewsletterDelivery.objects.update(next_attempt_at=timezone.now())
+
+    def test_a_refused_recipient_only_fails_its_own_delivery(self):
+        FlakyEmailBackend.rejected = {'reader1@example.com'}
+        started = timezone.now()
+
+        self.assertEqual(process_outbox(rate=0), 3)
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['reader0@example.com', 'reader2@example.com'])
+        refused = self.delivery('reader1@example.com')
+        self.assertEqual((refused.status, refused.attempts), (NewsletterDelivery.STATUS_PENDING, 1))
+        self.assertIn('Recipient refused', refused.last_error)
+        self.assertGreaterEqual(refused.next_attempt_at, started + retry_delay(1))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.sent_count), (NewsletterJob.STATUS_SENDING, 2))
+
+    def test_retries_back_off_exponentially(self):
+        self.assertEqual([retry_delay(attempt).total_seconds() for attempt in (1, 2, 3)], [60, 120, 240])
+        self.assertEqual(retry_delay(30).total_seconds(), 24 * 60 * 60)
+
+        FlakyEmailBackend.rejected = {'reader1@example.com'}
+        process_outbox(rate=0)
+        # Not due yet: nothing is attempted
+        self.assertEqual(process_outbox(rate=0), 0)
+
+        FlakyEmailBackend.rejected = set()
+        self.make_due()
+        self.assertEqual(process_outbox(rate=0), 1)
+        retried = self.delivery('reader1@example.com')
+        self.assertEqual((retried.status, retried.attempts), (NewsletterDelivery.STATUS_SENT, 2))
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_a_delivery_fails_after_max_attempts(self):
+        FlakyEmailBackend.rejected = {'reader1@example.com'}
+        for _ in range(3):
+            process_outbox(rate=0)
+            self.make_due()
+
+        refused = self.delivery('reader1@example.com')
+        self.assertEqual((refused.status, refused.attempts), (NewsletterDelivery.STATUS_FAILED, 3))
+        self.assertEqual(process_outbox(rate=0), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(
+            (self.job.status, self.job.sent_count, self.job.failed_count), (NewsletterJob.STATUS_DONE, 2, 1),
+        )
+
+    def test_an_interrupted_worker_does_not_resend(self):
+        FlakyEmailBackend.interrupt = 'reader1@example.com'
+        with self.assertRaises(KeyboardInterrupt):
+            process_outbox(rate=0)
+        self.assertEqual(self.delivery('reader0@example.com').status, NewsletterDelivery.STATUS_SENT)
+
+        # The rest of the chunk is still claimed, then due again once the claim runs out
+        FlakyEmailBackend.interrupt = None
+        self.assertEqual(process_outbox(rate=0), 0)
+        self.make_due()
+        self.assertEqual(process_outbox(rate=0), 2)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['reader0@example.com', 'reader1@example.com', 'reader2@example.com'])
+
+    def test_claimed_deliveries_are_not_handed_out_twice(self):
+        first = claim_deliveries(2)
+        second = claim_deliveries(2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual([delivery.email for delivery in second], ['reader2@example.com'])
+
+
+class OGImageTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.author = User.objects.create_user('author', password='password')
+        self.category = Category.objects.create(category_name='Photos')
+
+    @staticmethod
+    def upload(name, color):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1600, 1000), color).save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_custom_og_upload_survives_later_saves(self):
+        post = Blogs.objects.create(
+            title='Photo post', category=self.category, author=self.author,
+            short_description='Photos', blog_body='<p>Photos</p>', status=STATUS_PUBLISHED,
+            blog_image=self.upload('blog.jpg', 'red'), og_image=self.upload('social.jpg', 'blue'),
+        )
+        source, crop = post.image_renditions['og']['source'], post.og_image.name
+        self.assertTrue(source.startswith('og_images/'), source)
+
+        post = Blogs.objects.get(pk=post.pk)
+        post.title = 'Photo post, retitled'
+        post.save()
+        post.refresh_from_db()
+
+        self.assertEqual(post.image_renditions['og']['source'], source)
+        self.assertEqual(post.og_image.name, crop)
+        with post.og_image.open('rb') as og_image:
+            # Still the blue upload, not a crop of the red blog image
+            self.assertGreater(Image.open(og_image).convert('RGB').getpixel((600, 315))[2], 200)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_a_replica(self):
+        with primary_pinning():
+            self.assertEqual(self.router.db_for_read(Blogs), 'replica')
+
+    def test_writes_go_to_the_primary_and_pin_reads(self):
+        with primary_pinning():
+            with primary_pinning():
+                self.assertEqual(self.router.db_for_write(Comment), 'default')
+                self.assertEqual(self.router.db_for_read(Blogs), 'default')
+            self.assertFalse(is_pinned())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        with primary_pinning():
+            self.assertEqual(self.router.db_for_read(Blogs), 'default')
+            self.assertEqual(self.router.db_for_write(Blogs), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(self.router.allow_migrate('replica', 'blogs'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'blogs'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class CommandPinningTests(TestCase):
+    """There is no 'replica' database here, so a command that reads from one fails."""
+
+    def test_newsletter_worker_reads_from_the_primary(self):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        # In a fresh context: unpinned, and the pin does not outlive the command
+        contextvars.Context().run(call_command, 'send_newsletters', once=True, stdout=stdout, stderr=stderr)
+        self.assertEqual(stderr.getvalue(), '')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=15)
+class ReplicaPinningMiddlewareTests(SimpleTestCase):
+
+    def run_request(self, request, write=False):
+        router = PrimaryReplicaRouter()
+        seen = {}
+
+        def view(request):
+            seen['read_before'] = router.db_for_read(Blogs)
+            if write:
+                router.db_for_write(Comment)
+            seen['read_after'] = router.db_for_read(Blogs)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(request)
+        return response, seen
+
+    def test_a_write_pins_the_client(self):
+        response, seen = self.run_request(RequestFactory().get('/'), write=True)
+        self.assertEqual(seen, {'read_before': 'replica', 'read_after': 'default'})
+        cookie = response.cookies['primary_pin']
+        self.assertEqual(cookie['max-age'], 15)
+        self.assertTrue(cookie['httponly'])
+
+    def test_unsafe_requests_read_from_the_primary(self):
+        response, seen = self.run_request(RequestFactory().post('/'))
+        self.assertEqual(seen, {'read_before': 'default', 'read_after': 'default'})
+        self.assertNotIn('primary_pin', response.cookies)
+
+    def test_reads_alone_do_not_pin(self):
+        response, seen = self.run_request(RequestFactory().get('/'))
+        self.assertEqual(seen, {'read_before': 'replica', 'read_after': 'replica'})
+        self.assertNotIn('primary_pin', response.cookies)
+
+    def test_a_pinned_client_reads_from_the_primary(self):
+        request = RequestFactory().get('/')
+        request.COOKIES['primary_pin'] = '1'
+        _response, seen = self.run_request(request)
+        self.assertEqual(seen, {'read_before': 'default', 'read_after': 'default'})
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_unused_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaPinningMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,197 @@
+# blogs/utils/ad_counters.py
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def current_hour(now=None):
+    return (now or timezone.now()).replace(minute=0, second=0, microsecond=0)
+
+
+def normalize_placement(placement):
+    from blogs.models import Advertisement
+
+    placement = (placement or '').upper()
+    return placement if placement in dict(Advertisement.PLACEMENT_CHOICES) else ''
+
+
+def normalize_category(category_id):
+    try:
+        return max(int(category_id), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class AdCounterBuffer:
+    """
+    In-process buffer for ad impression/click increments.
+
+    Increments are summed in memory per (ad, placement, category, hour) and
+    written out as atomic F() updates, so every worker can flush its own
+    deltas without losing counts to the others. Each flush bumps the
+    lifetime totals on Advertisement and upserts the AdStatHourly rollups;
+    rows that received the same deltas share a single UPDATE.
+    """
+
+    def __init__(self, flush_interval=10, flush_threshold=500):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending = defaultdict(lambda: [0, 0])
+        self._per_ad = defaultdict(lambda: [0, 0])
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def add(self, ad_id, placement='', category_id=None, impressions=0, clicks=0, hour=None):
+        key = (ad_id, placement, normalize_category(category_id), hour or current_hour())
+        with self._lock:
+            self._increment(key, impressions, clicks)
+
+    def _increment(self, key, impressions, clicks):
+        for counts in (self._pending[key], self._per_ad[key[0]]):
+            counts[0] += impressions
+            counts[1] += clicks
+        self._pending_total += impressions + clicks
+
+    def pending(self, ad_id):
+        """(impressions, clicks) recorded in this process but not yet written."""
+        with self._lock:
+            counts = self._per_ad.get(ad_id)
+            return tuple(counts) if counts else (0, 0)
+
+    def should_flush(self):
+        return bool(self._pending_total) and (
+            self._pending_total >= self.flush_threshold
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def maybe_flush(self):
+        if self.should_flush():
+            self.flush()
+
+    def flush(self):
+        """Write all pending increments to the database. Returns the number of rollup rows updated."""
+        # Only one thread writes at a time; the others keep buffering
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                pending, per_ad = self._pending, self._per_ad
+                self._pending = defaultdict(lambda: [0, 0])
+                self._per_ad = defaultdict(lambda: [0, 0])
+                self._pending_total = 0
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            try:
+                with transaction.atomic():
+                    self._write_totals(per_ad)
+                    self._write_rollups(pending)
+            except Exception:
+                logger.exception("Failed to flush ad counters; keeping them for the next flush")
+                self._restore(pending)
+                return 0
+            return len(pending)
+        finally:
+            self._flush_lock.release()
+
+    def _write_totals(self, per_ad):
+        from blogs.models import Advertisement
+
+        by_delta = defaultdict(list)
+        for ad_id, (impressions, clicks) in per_ad.items():
+            by_delta[(impressions, clicks)].append(ad_id)
+
+        for (impressions, clicks), ad_ids in by_delta.items():
+            Advertisement.objects.filter(pk__in=ad_ids).update(
+                impressions=F('impressions') + impressions,
+                clicks=F('clicks') + clicks,
+            )
+
+    def _write_rollups(self, pending):
+        from blogs.models import AdStatHourly
+
+        # Make sure every bucket has a row, then add to it; the unique
+        # constraint turns concurrent inserts from other workers into no-ops
+        AdStatHourly.objects.bulk_create(
+            [AdStatHourly(ad_id=ad_id, placement=placement, category_key=category_key, hour=hour)
+             for ad_id, placement, category_key, hour in pending],
+            ignore_conflicts=True,
+        )
+        rows = AdStatHourly.objects.filter(
+            ad_id__in={key[0] for key in pending},
+            hour__in={key[3] for key in pending},
+        ).values_list('pk', 'ad_id', 'placement', 'category_key', 'hour')
+
+        by_delta = defaultdict(list)
+        for pk, *key in rows:
+            counts = pending.get(tuple(key))
+            if counts:
+                by_delta[tuple(counts)].append(pk)
+
+        for (impressions, clicks), pks in by_delta.items():
+            AdStatHourly.objects.filter(pk__in=pks).update(
+                impressions=F('impressions') + impressions,
+                clicks=F('clicks') + clicks,
+            )
+
+    def _restore(self, pending):
+        with self._lock:
+            for key, (impressions, clicks) in pending.items():
+                self._increment(key, impressions, clicks)
+
+    def clear(self):
+        """Drop the pending increments without writing them."""
+        with self._lock:
+            self._pending.clear()
+            self._per_ad.clear()
+            self._pending_total = 0
+            self._last_flush = time.monotonic()
+
+
+ad_counters = AdCounterBuffer(
+    flush_interval=getattr(settings, 'AD_COUNTER_FLUSH_INTERVAL', 10),
+    flush_threshold=getattr(settings, 'AD_COUNTER_FLUSH_THRESHOLD', 500),
+)
+
+
+def record_impressions(ads, placement='', category_id=None):
+    placement = normalize_placement(placement)
+    for ad in ads:
+        ad_counters.add(ad.pk, placement or ad.placement_area, category_id, impressions=1)
+
+
+def record_impression(ad_id, placement, category_id=None):
+    ad_counters.add(ad_id, placement, category_id, impressions=1)
+
+
+def record_click(ad_id, placement, category_id=None):
+    ad_counters.add(ad_id, placement, category_id, clicks=1)
+
+
+def pending_impressions(ad_id):
+    return ad_counters.pending(ad_id)[0]
+
+
+def get_ad_totals(ad):
+    """Near-real-time (impressions, clicks): the stored totals plus this process's unflushed counts."""
+    impressions, clicks = ad_counters.pending(ad.pk)
+    return ad.impressions + impressions, ad.clicks + clicks
+
+
+def flush_ad_counters(**kwargs):
+    return ad_counters.flush()
+
+
+# Whatever is still buffered when the process exits is written out
+atexit.register(flush_ad_counters)
@@ -0,0 +1,198 @@
+# blogs/utils/ad_engine.py
+import itertools
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .ad_counters import pending_impressions
+
+
+class AdEntry:
+    """Immutable snapshot of one active ad with its targeting precomputed."""
+    __slots__ = ('ad', 'id', 'placement', 'ad_type', 'priority', 'strategy',
+                 'start_date', 'end_date', 'category_ids', 'max_display_count', 'impressions')
+
+    def __init__(self, ad, category_ids):
+        self.ad = ad
+        self.id = ad.pk
+        self.placement = ad.placement_area
+        self.ad_type = ad.ad_type
+        self.priority = ad.priority
+        self.strategy = ad.display_strategy
+        self.start_date = ad.start_date
+        self.end_date = ad.end_date
+        self.category_ids = frozenset(category_ids)
+        self.max_display_count = ad.max_display_count
+        self.impressions = ad.impressions
+
+    def is_live(self, now):
+        if self.start_date and self.start_date > now:
+            return False
+        if self.end_date and self.end_date < now:
+            return False
+        return True
+
+
+class AdIndex:
+    """
+    Per-process index of every active ad, grouped by placement and by target
+    category, so ad slots can be filled without touching the database.
+    """
+
+    def __init__(self, ads):
+        self.built_at = time.monotonic()
+        self.by_placement = defaultdict(list)
+        self.by_category = defaultdict(lambda: defaultdict(list))
+        self.untargeted = defaultdict(list)
+        # Shown since the index was built; shared by the threads of this process
+        self.shown = defaultdict(int)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+        for ad in ads:
+            entry = AdEntry(ad, [category.pk for category in ad.target_categories.all()])
+            # Count impressions that are still buffered towards max_display_count
+            entry.impressions += pending_impressions(entry.id)
+            self.by_placement[entry.placement].append(entry)
+            if entry.category_ids:
+                for category_id in entry.category_ids:
+                    self.by_category[entry.placement][category_id].append(entry)
+            else:
+                self.untargeted[entry.placement].append(entry)
+
+    @classmethod
+    def build(cls):
+        from blogs.models import Advertisement
+
+        ads = Advertisement.objects.filter(is_active=True).prefetch_related('target_categories')
+        return cls(ads)
+
+    def is_expired(self, ttl):
+        return time.monotonic() - self.built_at > ttl
+
+    def displayed_count(self, entry):
+        return entry.impressions + self.shown.get(entry.id, 0)
+
+    def mark_shown(self, entries):
+        with self._lock:
+            for entry in entries:
+                self.shown[entry.id] += 1
+
+    def _available(self, entries, now, ad_type):
+        return [
+            entry for entry in entries
+            if entry.is_live(now)
+            and (not ad_type or entry.ad_type == ad_type)
+            and (not entry.max_display_count or self.displayed_count(entry) < entry.max_display_count)
+        ]
+
+    def eligible(self, placement, category_id=None, ad_type=None, now=None):
+        """
+        Live ads for a placement, highest priority first. With a category, ads
+        targeting it (or targeting nothing) win; if none match, every live ad
+        for the placement is used as a fallback.
+        """
+        now = now or timezone.now()
+        available = self._available(self.by_placement.get(placement, ()), now, ad_type)
+        if category_id and available:
+            try:
+                category_id = int(category_id)
+            except (TypeError, ValueError):
+                category_id = None
+            targeted = self.by_category[placement].get(category_id, []) if placement in self.by_category else []
+            matching = self._available(targeted + self.untargeted.get(placement, []), now, ad_type)
+            if matching:
+                available = matching
+        # Highest priority first; equal priorities rotate randomly
+        available.sort(key=lambda entry: (-entry.priority, random.random()))
+        return available
+
+    def eligible_for_placements(self, placements, now=None):
+        now = now or timezone.now()
+        entries = []
+        for placement in placements:
+            entries.extend(self.eligible(placement, now=now))
+        entries.sort(key=lambda entry: -entry.priority)
+        return [entry.ad for entry in entries]
+
+    def select(self, entries):
+        """Pick one entry by display strategy (weighted, then sequential, then random)."""
+        if not entries:
+            return None
+        weighted = [e for e in entries if e.strategy in ('WEIGHTED', 'CATEGORY_MATCH')]
+        sequential = [e for e in entries if e.strategy == 'SEQUENTIAL']
+        random_ads = [e for e in entries if e.strategy == 'RANDOM']
+
+        if weighted:
+            entry = select_weighted_ad(weighted)
+        elif sequential:
+            return self.select_sequential(sequential)
+        elif random_ads:
+            entry = random.choice(random_ads)
+        else:
+            entry = select_weighted_ad(entries)
+        self.mark_shown([entry])
+        return entry
+
+    def select_sequential(self, entries):
+        # Round-robin: least shown first, ties broken by a rotating offset.
+        # Picked and counted under the lock, so concurrent requests rotate
+        with self._lock:
+            entry = self._least_shown(entries, next(self._sequence))
+            self.shown[entry.id] += 1
+        return entry
+
+    def _least_shown(self, entries, offset):
+        ordered = sorted(entries, key=self.displayed_count)
+        lowest = self.displayed_count(ordered[0])
+        tied = [entry for entry in ordered if self.displayed_count(entry) == lowest]
+        return tied[offset % len(tied)]
+
+
+def select_weighted_ad(entries):
+    """Select an ad based on priority weights"""
+    if not entries:
+        return None
+    weights = [max(entry.priority, 1) for entry in entries]
+    return random.choices(entries, weights=weights, k=1)[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ad_index():
+    """Return the process-wide ad index, rebuilding it when invalidated or older than AD_INDEX_TTL."""
+    global _index
+    index = _index
+    ttl = getattr(settings, 'AD_INDEX_TTL', 60)
+    if index is None or index.is_expired(ttl):
+        with _index_lock:
+            index = _index
+            if index is None or index.is_expired(ttl):
+                index = _index = AdIndex.build()
+    return index
+
+
+def invalidate_ad_index():
+    global _index
+    _index = None
+
+
+def choose_ad(placement_area, post_category_id=None, ad_type=None):
+    """Select a single ad for a placement, entirely in memory. Returns an Advertisement or None."""
+    index = get_ad_index()
+    entry = index.select(index.eligible(placement_area, post_category_id, ad_type))
+    return entry.ad if entry else None
+
+
+def choose_ads(placement_area, count=3, post_category_id=None, ad_type=None):
+    """Return up to `count` ads for a placement in priority order."""
+    index = get_ad_index()
+    entries = index.eligible(placement_area, post_category_id, ad_type)[:count]
+    index.mark_shown(entries)
+    return [entry.ad for entry in entries]
@@ -0,0 +1,85 @@
+# blogs/utils/ad_reports.py
+from datetime import datetime, time, timedelta
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+GROUP_BY_CHOICES = [
+    ('day', 'Day'),
+    ('placement', 'Placement'),
+    ('category', 'Category'),
+    ('ad', 'Advertisement'),
+]
+
+
+def ctr(impressions, clicks):
+    return round(clicks * 100 / impressions, 2) if impressions else 0
+
+
+def _bounds(start_date, end_date):
+    """Aware datetimes covering start_date 00:00 up to (not including) the day after end_date."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def build_ad_report(start_date, end_date, group_by='day', ad=None):
+    """
+    Impressions, clicks and CTR from the hourly rollups between two dates
+    (inclusive), grouped by day, placement, category or ad. Only reads
+    AdStatHourly rows through the (hour, ad) index.
+    """
+    from blogs.models import AdStatHourly, Category
+
+    start, end = _bounds(start_date, end_date)
+    stats = AdStatHourly.objects.filter(hour__gte=start, hour__lt=end)
+    if ad is not None:
+        stats = stats.filter(ad=ad)
+
+    if group_by == 'day':
+        stats = stats.annotate(day=TruncDate('hour')).values('day')
+        label_field = 'day'
+    elif group_by == 'placement':
+        stats = stats.values('placement')
+        label_field = 'placement'
+    elif group_by == 'category':
+        stats = stats.values('category_key')
+        label_field = 'category_key'
+    else:
+        stats = stats.values('ad_id', 'ad__name')
+        label_field = 'ad__name'
+
+    rows = list(
+        stats.annotate(total_impressions=Sum('impressions'), total_clicks=Sum('clicks'))
+        .order_by(label_field)
+    )
+
+    if group_by == 'category':
+        names = dict(Category.objects.filter(
+            pk__in=[row['category_key'] for row in rows]
+        ).values_list('pk', 'category_name'))
+    elif group_by == 'placement':
+        from blogs.models import Advertisement
+        names = dict(Advertisement.PLACEMENT_CHOICES)
+    else:
+        names = {}
+
+    report = []
+    totals = {'impressions': 0, 'clicks': 0}
+    for row in rows:
+        key = row[label_field]
+        if group_by == 'category':
+            label = names.get(key, 'No category') if key else 'No category'
+        elif group_by == 'placement':
+            label = names.get(key, key or 'Unknown')
+        else:
+            label = key
+        impressions, clicks = row['total_impressions'] or 0, row['total_clicks'] or 0
+        totals['impressions'] += impressions
+        totals['clicks'] += clicks
+        report.append({'label': label, 'impressions': impressions, 'clicks': clicks, 'ctr': ctr(impressions, clicks)})
+
+    totals['ctr'] = ctr(totals['impressions'], totals['clicks'])
+    return report, totals
@@ -0,0 +1,48 @@
+# blogs/utils/ad_slots.py
+import json
+import re
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .ad_counters import record_impressions
+from .ad_engine import choose_ad
+
+AD_SLOT_RE = re.compile(rb'<!--ad-slot:(\{[^>]*?\})-->')
+
+
+def render_ad(placement_area, post_category_id=None, ad_size='auto', ad_type=None):
+    """Pick an ad for the slot, count the impression and return its HTML ('' when nothing is eligible)."""
+    selected_ad = choose_ad(placement_area, post_category_id, ad_type)
+    if not selected_ad:
+        return ''
+
+    record_impressions([selected_ad], placement_area, post_category_id)
+    return mark_safe(render_to_string('blogs/includes/advertisement.html', {
+        'ad': selected_ad,
+        'placement_area': placement_area,
+        'ad_size': ad_size,
+        'post_category_id': post_category_id,
+    }))
+
+
+def ad_slot_marker(placement_area, post_category_id=None, ad_size='auto', ad_type=None):
+    """
+    Placeholder left in cached pages instead of an ad. fill_ad_slots() swaps
+    it for a freshly selected ad on every response, so cached pages still
+    rotate ads and count impressions.
+    """
+    args = json.dumps([placement_area, post_category_id, ad_size, ad_type], separators=(',', ':'))
+    return mark_safe(f'<!--ad-slot:{{"slot":{args}}}-->')
+
+
+def fill_ad_slots(content, charset='utf-8'):
+    """Replace every ad slot marker in rendered page content (bytes)."""
+    def render_slot(match):
+        try:
+            placement_area, post_category_id, ad_size, ad_type = json.loads(match.group(1))['slot']
+        except (ValueError, KeyError, TypeError):
+            return b''
+        return render_ad(placement_area, post_category_id, ad_size, ad_type).encode(charset)
+
+    return AD_SLOT_RE.sub(render_slot, content)
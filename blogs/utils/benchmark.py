@@ -0,0 +1,173 @@
+# blogs/utils/benchmark.py
+import random
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .ad_counters import ad_counters
+from .ad_engine import invalidate_ad_index
+from .breadcrumbs import _resolve_pattern
+from .profiling import percentile, profile_request
+from .site_cache import site_cache
+
+WORDS = """
+python django database query index cache template view model request response server client
+performance latency throughput memory profile benchmark design pattern testing deployment
+security privacy network browser image layout mobile search ranking content writer editor
+travel food health finance science history music garden coffee sports startup marketing
+""".split()
+
+
+def reset_process_caches():
+    """Empty every cache kept by this process, so each measurement starts cold."""
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    site_cache.clear()
+    invalidate_ad_index()
+    _resolve_pattern.cache_clear()
+    ad_counters.clear()
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed_dataset(posts=500, categories=20, ads=16, comments=5, subscribers=1000, seed=0):
+    """
+    Fill the (empty, throwaway) database with a synthetic site. Rows are
+    bulk-created, so the derived data the signals would maintain (search
+    index, comment counts, related posts) is rebuilt afterwards. Returns
+    the row counts.
+    """
+    from django.contrib.auth.models import User
+
+    from blogs.models import STATUS_DRAFT, STATUS_PUBLISHED, Advertisement, Blogs, Category, Comment, NewsletterSubscriber
+    from .related import rebuild_related_posts
+    from .search import get_search_backend
+
+    rng = random.Random(seed)
+    author = User.objects.create_user('benchmark-author', 'author@example.com', 'benchmark')
+    readers = User.objects.bulk_create(
+        User(username=f'benchmark-reader-{i}', email=f'reader{i}@example.com') for i in range(20)
+    )
+
+    category_objs = []
+    for i in range(categories):
+        category = Category(category_name=f'{rng.choice(WORDS).title()} {i}')
+        category.save()
+        category_objs.append(category)
+
+    post_objs = []
+    for i in range(posts):
+        title = f'{_sentence(rng, 6)} {i}'
+        post = Blogs(
+            title=title,
+            slug=f'benchmark-post-{i}',
+            category=rng.choice(category_objs),
+            author=author,
+            short_description=_sentence(rng, 30),
+            blog_body=''.join(f'<p>{_sentence(rng, 80)}.</p>' for _ in range(rng.randint(5, 15))),
+            status=STATUS_PUBLISHED if rng.random() < 0.9 else STATUS_DRAFT,
+            is_featured=rng.random() < 0.05,
+            meta_title=title[:70],
+            meta_description=_sentence(rng, 20)[:300],
+        )
+        post.update_reading_stats()
+        post_objs.append(post)
+    post_objs = Blogs.objects.bulk_create(post_objs, batch_size=200)
+
+    Comment.objects.bulk_create(
+        (
+            Comment(user=rng.choice(readers), blog=post, comment=_sentence(rng, 25)[:250])
+            for post in post_objs for _ in range(rng.randint(0, comments * 2))
+        ),
+        batch_size=500,
+    )
+    per_post = Comment.objects.filter(blog=OuterRef('pk')).values('blog').annotate(total=Count('id')).values('total')
+    Blogs.objects.update(comment_count=Coalesce(Subquery(per_post), Value(0)))
+
+    placements = [placement for placement, _label in Advertisement.PLACEMENT_CHOICES]
+    for i in range(ads):
+        ad = Advertisement.objects.create(
+            name=f'Benchmark ad {i}',
+            placement_area=placements[i % len(placements)],
+            display_strategy=rng.choice(['RANDOM', 'WEIGHTED', 'CATEGORY_MATCH']),
+            ad_code=f'<div class="ad">{_sentence(rng, 5)}</div>',
+            priority=rng.randint(1, 10),
+        )
+        ad.target_categories.set(rng.sample(category_objs, min(2, len(category_objs))))
+
+    NewsletterSubscriber.objects.bulk_create(
+        (NewsletterSubscriber(email=f'subscriber{i}@example.com') for i in range(subscribers)),
+        batch_size=500,
+    )
+
+    get_search_backend().rebuild()
+    rebuild_related_posts()
+    reset_process_caches()
+    return {
+        'posts': posts,
+        'categories': categories,
+        'ads': ads,
+        'comments': Comment.objects.count(),
+        'subscribers': subscribers,
+    }
+
+
+def measure(client, method, urls, requests, warmup=0, data=None):
+    """
+    Issue `requests` requests (after `warmup` unrecorded ones), cycling
+    through `urls`. Returns the latency, query count and status summary.
+    """
+    send = getattr(client, method)
+    for i in range(warmup):
+        send(urls[i % len(urls)], data=data)
+
+    latencies, queries, statuses = [], [], {}
+    for i in range(requests):
+        with profile_request() as profile:
+            start = time.perf_counter()
+            response = send(urls[i % len(urls)], data=data)
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(profile.queries)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    latencies.sort()
+    queries.sort()
+    elapsed = sum(latencies) / 1000
+    return {
+        'requests': requests,
+        'requests_per_second': round(requests / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3),
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2),
+            'p50': percentile(queries, 0.50),
+            'max': queries[-1],
+        },
+        'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def git_revision():
+    """(commit hash, working tree has uncommitted changes), or (None, None) outside a checkout."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
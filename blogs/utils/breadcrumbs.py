@@ -1,7 +1,35 @@
 # blogs/utils/breadcrumbs.py
+import re
+from functools import lru_cache
+
 from django.urls import resolve, Resolver404
+from django.utils.functional import SimpleLazyObject
 from django.utils.text import slugify
 
+NUMERIC_SEGMENT_RE = re.compile(r'(?<=/)\d+(?=/|$)')
+
+
+@lru_cache(maxsize=512)
+def _resolve_pattern(pattern_path):
+    try:
+        match = resolve(pattern_path)
+    except Resolver404:
+        return None
+    return match.url_name, match.func
+
+
+def resolve_prefix(path):
+    """
+    Resolve a path prefix to (url_name, view_func), or None if it doesn't match.
+    Numeric segments are normalised so '/category/3' and '/category/7'
+    share one cache entry.
+    """
+    return _resolve_pattern(NUMERIC_SEGMENT_RE.sub('0', path))
+
+
+resolve_prefix.cache_clear = _resolve_pattern.cache_clear
+
+
 class Breadcrumb:
     def __init__(self, title, url=None, is_active=False):
         self.title = title
@@ -12,29 +40,34 @@ class BreadcrumbBuilder:
     def __init__(self, request):
         self.request = request
         self.breadcrumbs = []
-    
+
     def add(self, title, url=None, is_active=False):
         breadcrumb = Breadcrumb(title, url, is_active)
         self.breadcrumbs.append(breadcrumb)
         return self
-    
+
     def auto_detect_from_url(self):
         """Automatically generate breadcrumbs from URL pattern"""
         path_components = self.request.path_info.strip('/').split('/')
         accumulated_path = ''
-        
+
+        # Trails always start at Home, matching the ones views set explicitly
+        if path_components == ['']:
+            return self.add('Home', '/', True)
+        self.add('Home', '/')
+
         for i, component in enumerate(path_components):
             accumulated_path += f'/{component}'
-            
-            try:
-                match = resolve(accumulated_path)
-                view_name = match.url_name
-                
+
+            resolved = resolve_prefix(accumulated_path)
+            if resolved is not None:
+                view_name, view_func = resolved
+
                 # Skip numeric components (like category IDs)
                 if component.isdigit():
                     # Try to get the object name from context or skip
                     continue
-                
+
                 # Map view names to breadcrumb titles
                 title_map = {
                     'home': 'Home',
@@ -46,13 +79,13 @@ class BreadcrumbBuilder:
                     'tag_list': 'Tags',
                     'search': 'Search Results',
                 }
-                
+
                 title = title_map.get(view_name, component.replace('-', ' ').title())
-                
+
                 # For detail views, try to get object title
-                if view_name == 'post_detail' and hasattr(match.func, 'view_class'):
+                if view_name == 'post_detail' and hasattr(view_func, 'view_class'):
                     try:
-                        obj = match.func.view_class.model.objects.get(slug=component)
+                        obj = view_func.view_class.model.objects.get(slug=component)
                         title = obj.title
                     except:
                         pass
@@ -65,21 +98,40 @@ class BreadcrumbBuilder:
                         title = category.category_name
                     except:
                         pass
-                
+
                 is_active = (i == len(path_components) - 1)
                 url = accumulated_path if not is_active else None
-                
+
                 self.add(title, url, is_active)
-                
-            except Resolver404:
+
+            else:
                 # Skip numeric components and unknown paths that are likely IDs
                 if not component.isdigit():
                     title = component.replace('-', ' ').title()
                     is_active = (i == len(path_components) - 1)
                     url = accumulated_path if not is_active else None
                     self.add(title, url, is_active)
-        
+
         return self
-    
+
     def build(self):
-        return self.breadcrumbs
\ No newline at end of file
+        return self.breadcrumbs
+
+
+def lazy_breadcrumbs(request):
+    """
+    Auto-detected breadcrumbs that are only built if a template actually
+    renders them, and at most once per request.
+    """
+    return SimpleLazyObject(lambda: BreadcrumbBuilder(request).auto_detect_from_url().build())
+
+
+def get_request_breadcrumbs(request):
+    """
+    Breadcrumbs for this request: whatever the view set on request.breadcrumbs,
+    otherwise the lazy auto-detected trail installed by BreadcrumbMiddleware.
+    """
+    crumbs = getattr(request, 'breadcrumbs', None)
+    if crumbs is None:
+        crumbs = request.breadcrumbs = lazy_breadcrumbs(request)
+    return crumbs
@@ -0,0 +1,63 @@
+# blogs/utils/comments.py
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.timesince import timesince
+
+DEFAULT_PAGE_SIZE = 20
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(comment):
+    """Position after `comment` in newest-first order: '<created_at µs>-<id>'."""
+    micros = (comment.created_at - EPOCH) // MICROSECOND
+    return f'{micros}-{comment.pk}'
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from encode_cursor(), or None if the cursor is malformed."""
+    try:
+        micros, pk = (int(part) for part in cursor.split('-', 1))
+        created_at = EPOCH + micros * MICROSECOND
+    except (AttributeError, ValueError, OverflowError):
+        return None
+    return created_at, pk
+
+
+def comment_page(blog_id, cursor=None, limit=None):
+    """
+    One page of a post's comments, newest first, with their authors, plus
+    the cursor of the next page (None on the last one). Served from the
+    (blog, created_at) index by seeking past the cursor, never with OFFSET.
+    Raises ValueError for a cursor that encode_cursor() did not make.
+    """
+    from blogs.models import Comment
+
+    limit = limit or getattr(settings, 'COMMENTS_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    comments = Comment.objects.filter(blog_id=blog_id).select_related('user').order_by('-created_at', '-id')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise ValueError(f"Malformed comments cursor: {cursor!r}")
+        created_at, pk = position
+        comments = comments.filter(
+            Q(created_at__lt=created_at) | Q(id__lt=pk), created_at__lte=created_at,
+        )
+
+    # One extra row tells whether there is a next page
+    page = list(comments[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+
+def serialize_comment(comment):
+    user = comment.user
+    return {
+        'id': comment.pk,
+        'author': user.get_full_name() or user.username,
+        'comment': comment.comment,
+        'created_at': comment.created_at.isoformat(),
+        'timesince': timesince(comment.created_at),
+    }
@@ -0,0 +1,105 @@
+# blogs/utils/conditional.py
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Max
+from django.views.decorators.http import condition
+
+from .page_cache import BASE_TAGS, get_tag_versions
+
+
+def _tag_time(version):
+    # Tag versions are the time.time_ns() of their last bump
+    return datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+
+
+def compute_validators(request, freshness):
+    """
+    (etag, last_modified) for a page whose primary content was last updated
+    at `timestamp` and which also depends on page cache `tags`.
+
+    The tag versions change whenever comments, categories, social links or
+    other posts on the page change (see blogs.signals), so they cover
+    everything the timestamp alone would miss, deletions included.
+    """
+    if freshness is None:
+        return None, None
+    timestamp, tags = freshness
+    versions = get_tag_versions(BASE_TAGS + tuple(tags))
+
+    candidates = [_tag_time(version) for version in versions.values()]
+    if timestamp is not None:
+        candidates.append(timestamp)
+    last_modified = max(candidates)
+
+    user = request.user
+    fingerprint = '|'.join([
+        timestamp.isoformat() if timestamp else '',
+        ','.join(f'{tag}={versions[tag]}' for tag in sorted(versions)),
+        str(user.pk) if user.is_authenticated else 'anon',
+    ])
+    etag = 'W/"%s"' % hashlib.md5(fingerprint.encode('utf-8')).hexdigest()
+    return etag, last_modified
+
+
+def conditional_page(freshness_func):
+    """
+    Like django.views.decorators.http.condition(), but the ETag and
+    Last-Modified come from a single freshness_func(request, *args, **kwargs)
+    call, memoized on the request. freshness_func returns
+    (timestamp, tags), or None when the page does not exist.
+    """
+    def validators(request, *args, **kwargs):
+        cached = getattr(request, '_page_validators', None)
+        if cached is None:
+            cached = request._page_validators = compute_validators(
+                request, freshness_func(request, *args, **kwargs)
+            )
+        return cached
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: validators(request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: validators(request, *args, **kwargs)[1],
+    )
+
+
+# ---------------------------------------
+# FRESHNESS FUNCTIONS (one indexed query each)
+# ---------------------------------------
+def latest_post_update(**filters):
+    from blogs.models import Blogs, STATUS_PUBLISHED
+
+    return Blogs.objects.filter(status=STATUS_PUBLISHED, **filters).aggregate(latest=Max('updated_at'))['latest']
+
+
+def home_freshness(request):
+    return latest_post_update(), ('posts',)
+
+
+def category_freshness(request, category_id):
+    return latest_post_update(category_id=category_id), ('posts',)
+
+
+def blog_detail_freshness(request, slug):
+    from blogs.models import Blogs, STATUS_PUBLISHED
+
+    row = Blogs.objects.filter(slug=slug, status=STATUS_PUBLISHED).values_list('pk', 'updated_at').first()
+    if row is None:
+        return None
+    pk, updated_at = row
+    return updated_at, ('posts', f'blog:{pk}')
+
+
+def legal_page_freshness(request, page_type):
+    from blogs.models import LegalPage
+
+    last_updated = LegalPage.objects.filter(
+        page_type=page_type, is_published=True
+    ).values_list('last_updated', flat=True).first()
+    if last_updated is None:
+        return None
+    return last_updated, (f'legal:{page_type}',)
+
+
+def sitemap_freshness(request, **kwargs):
+    return latest_post_update(), ('posts', 'legal')
@@ -0,0 +1,54 @@
+# blogs/utils/html.py
+from html import unescape
+from html.parser import HTMLParser
+
+# Tags whose content never reaches the reader
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+# Tags that visually separate words, so their boundaries must become spaces
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table',
+    'td', 'th', 'tr', 'ul',
+}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    """
+    Convert TinyMCE HTML into plain, whitespace-normalised text.
+    Script/style content is dropped and block elements are treated as word breaks.
+    """
+    if not html:
+        return ''
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # Fall back to the raw markup rather than losing the content
+        return ' '.join(unescape(html).split())
+    return ' '.join(''.join(parser.parts).split())
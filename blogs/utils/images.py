@@ -0,0 +1,246 @@
+# blogs/utils/images.py
+import hashlib
+import io
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageFilter, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = 'renditions'
+DEFAULT_WIDTHS = (120, 400, 800, 1200)
+
+OG_IMAGE_DIR = 'og_images/generated'
+DEFAULT_OG_IMAGE_SIZE = (1200, 630)
+# Part of the OG image cache key: bump to regenerate every OG image
+OG_IMAGE_VERSION = 1
+
+# Pillow format name, file extension and MIME type of each rendition format
+FORMATS = {
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+}
+
+
+def rendition_widths():
+    return sorted(set(getattr(settings, 'IMAGE_RENDITION_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def rendition_name(source_name, width, fmt):
+    """Storage name of one rendition, e.g. renditions/uploads/2025/09/15/photo-400w.webp"""
+    stem = posixpath.splitext(source_name)[0]
+    return posixpath.join(RENDITIONS_DIR, f'{stem}-{width}w.{FORMATS[fmt][1]}')
+
+
+def _open_image(storage, name):
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    return image
+
+
+def _encode(image, fmt):
+    pil_format = FORMATS[fmt][0]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha channel: flatten transparent images onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, quality=getattr(settings, 'IMAGE_RENDITION_QUALITY', 80), optimize=True)
+    return buffer.getvalue()
+
+
+def build_renditions(source_name, storage=None):
+    """
+    Create WebP and JPEG renditions of a stored image at each configured
+    width (never upscaled) and return their description:
+
+        {'source': name, 'width': w, 'height': h,
+         'webp': [[width, name], ...], 'jpeg': [[width, name], ...]}
+
+    Only 'source' is set if the file is missing or not an image, so it is
+    not retried on every save; templates then fall back to the original.
+    """
+    storage = storage or default_storage
+    try:
+        image = _open_image(storage, source_name)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning("Cannot build renditions of %s: %s", source_name, exc)
+        return {'source': source_name}
+
+    original_width, original_height = image.size
+    widths = [w for w in rendition_widths() if w < original_width] + [min(original_width, rendition_widths()[-1])]
+    widths = sorted(set(widths), reverse=True)
+
+    entry = {'source': source_name, 'width': original_width, 'height': original_height}
+    for fmt in FORMATS:
+        entry[fmt] = []
+
+    # Largest first, each one resized from the previous: much cheaper than
+    # resampling the full-size upload every time
+    current = image
+    for width in widths:
+        height = max(1, round(original_height * width / original_width))
+        if current.size != (width, height):
+            current = current.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        for fmt in FORMATS:
+            name = rendition_name(source_name, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(_encode(current, fmt)))
+            entry[fmt].append([width, name])
+
+    for fmt in FORMATS:
+        entry[fmt].sort()
+    return entry
+
+
+def pick_rendition(entry, fmt, width):
+    """Name of the smallest rendition at least `width` wide (the largest if none is)."""
+    candidates = entry.get(fmt) or []
+    if not candidates:
+        return None
+    for rendition_width, name in candidates:
+        if rendition_width >= width:
+            return name
+    return candidates[-1][1]
+
+
+# ---------------------------------------
+# OPEN GRAPH IMAGES
+# ---------------------------------------
+def og_image_size():
+    return tuple(getattr(settings, 'OG_IMAGE_SIZE', DEFAULT_OG_IMAGE_SIZE))
+
+
+def is_generated_og_image(name):
+    return bool(name) and name.startswith(OG_IMAGE_DIR + '/')
+
+
+def _source_digest(storage, name, size):
+    digest = hashlib.sha1(f'{size[0]}x{size[1]}:v{OG_IMAGE_VERSION}:'.encode())
+    with storage.open(name, 'rb') as source:
+        for chunk in iter(lambda: source.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _focus_centering(image, ratio):
+    """
+    ImageOps.fit() centering that keeps the most detailed part of the image
+    when cropping it to `ratio`: edges are summed per column (or row) on a
+    small grayscale copy and the window with the most edge energy wins,
+    the one closest to the middle on ties.
+    """
+    width, height = image.size
+    crop_x = width / height > ratio
+    if abs(width / height - ratio) < 0.01:
+        return (0.5, 0.5)
+
+    small = image.convert('L')
+    small.thumbnail((200, 200))
+    edges = small.filter(ImageFilter.FIND_EDGES)
+    small_width, small_height = edges.size
+    pixels = list(edges.getdata())
+    if crop_x:
+        profile = [sum(pixels[x::small_width]) for x in range(small_width)]
+        window = min(small_width, max(1, round(small_height * ratio)))
+    else:
+        profile = [sum(pixels[y * small_width:(y + 1) * small_width]) for y in range(small_height)]
+        window = min(small_height, max(1, round(small_width / ratio)))
+
+    free = len(profile) - window
+    if free <= 0:
+        return (0.5, 0.5)
+    energy = sum(profile[:window])
+    best_start, best_key = 0, None
+    for start in range(free + 1):
+        if start:
+            energy += profile[start + window - 1] - profile[start - 1]
+        key = (energy, -abs(start - free / 2))
+        if best_key is None or key > best_key:
+            best_start, best_key = start, key
+    position = best_start / free
+    return (position, 0.5) if crop_x else (0.5, position)
+
+
+def build_og_image(source_name, storage=None):
+    """
+    A JPEG Open Graph image (OG_IMAGE_SIZE, 1200x630 by default) cropped
+    from a stored image around its most detailed region. Smaller sources are
+    cropped to the same aspect ratio without upscaling.
+
+    The file is named after a hash of the source contents, so re-saving a
+    post (or another post using the same picture) reuses it instead of
+    encoding it again. Returns (name, width, height), or None if the source
+    is missing or not an image.
+    """
+    storage = storage or default_storage
+    size = og_image_size()
+    try:
+        name = posixpath.join(OG_IMAGE_DIR, _source_digest(storage, source_name, size) + '.jpg')
+        if storage.exists(name):
+            with storage.open(name, 'rb') as existing:
+                return (name, *Image.open(existing).size)
+        image = _open_image(storage, source_name)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning("Cannot build an OG image from %s: %s", source_name, exc)
+        return None
+
+    ratio = size[0] / size[1]
+    width, height = image.size
+    crop_width = min(width, height * ratio)
+    output = (max(1, min(size[0], round(crop_width))), max(1, min(size[1], round(crop_width / ratio))))
+    cropped = ImageOps.fit(image, output, Image.LANCZOS, centering=_focus_centering(image, ratio))
+    name = storage.save(name, ContentFile(_encode(cropped, 'jpeg')))
+    return name, *cropped.size
+
+
+# ---------------------------------------
+# RECOMPRESSION (manage.py optimize_media)
+# ---------------------------------------
+OPTIMIZABLE_EXTENSIONS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}
+
+
+def recompress_image(data, extension, jpeg_quality=85, webp_quality=85):
+    """
+    Re-encode image bytes in the same format with EXIF/XMP and text chunks
+    removed (the ICC profile is kept and EXIF orientation is applied to the
+    pixels first). Returns the new bytes, or None for formats we do not
+    touch and animated images.
+    """
+    pil_format = OPTIMIZABLE_EXTENSIONS.get(extension.lower())
+    if pil_format is None:
+        return None
+    image = Image.open(io.BytesIO(data))
+    if getattr(image, 'is_animated', False) or image.format != pil_format:
+        # Animations, or a file whose extension lies about its format
+        return None
+    image = ImageOps.exif_transpose(image)
+
+    options = {}
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    if pil_format == 'JPEG':
+        if image.mode not in ('RGB', 'L', 'CMYK'):
+            image = image.convert('RGB')
+        options.update(quality=jpeg_quality, optimize=True, progressive=True)
+    elif pil_format == 'PNG':
+        if 'transparency' in image.info:
+            options['transparency'] = image.info['transparency']
+        options.update(optimize=True)
+    else:
+        options.update(quality=webp_quality, method=6)
+
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
@@ -0,0 +1,286 @@
+# blogs/utils/newsletter.py
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+logger = logging.getLogger(__name__)
+
+LATEST_POSTS_CACHE_KEY = 'newsletter:latest_posts'
+
+
+def newsletter_setting(name, default):
+    return getattr(settings, f'NEWSLETTER_{name}', default)
+
+
+# ---------------------------------------
+# ENQUEUE
+# ---------------------------------------
+def enqueue_newsletter(subject, text_body, html_body, recipients, created_by=None):
+    """
+    Store a newsletter and one pending delivery per (email, name) recipient.
+    Returns the NewsletterJob; nothing is sent until the send_newsletters
+    worker picks it up.
+    """
+    from blogs.models import NewsletterJob, NewsletterDelivery
+
+    unique = {}
+    for email, name in recipients:
+        if email:
+            unique.setdefault(email.strip().lower(), (email.strip(), name or ''))
+
+    with transaction.atomic():
+        job = NewsletterJob.objects.create(
+            subject=subject,
+            text_body=text_body,
+            html_body=html_body,
+            total_count=len(unique),
+            created_by=created_by,
+        )
+        NewsletterDelivery.objects.bulk_create(
+            [NewsletterDelivery(job=job, email=email, name=name) for email, name in unique.values()],
+            batch_size=500,
+        )
+    return job
+
+
+def enqueue_custom_newsletter(subject, message, created_by=None, extra_recipients=()):
+    """Render the custom newsletter once and queue it for every subscriber. Returns None if there is nobody to send to."""
+    from blogs.models import NewsletterSubscriber
+
+    recipients = list(NewsletterSubscriber.objects.values_list('email', 'name'))
+    if not recipients:
+        return None
+
+    context = {
+        'subject': subject,
+        'message': message,
+        'site_name': getattr(settings, 'SITE_NAME', 'My Blog'),
+        'domain': getattr(settings, 'DOMAIN', 'http://127.0.0.1:8000/'),
+        'now': timezone.now(),
+    }
+    text_body = render_to_string('newsletter/custom_newsletter.txt', context)
+    html_body = render_to_string('newsletter/custom_newsletter.html', context)
+    return enqueue_newsletter(subject, text_body, html_body, recipients + list(extra_recipients), created_by)
+
+
+def enqueue_welcome_email(email, name=''):
+    """Queue a welcome email for a new subscriber. It is rendered by the worker at send time."""
+    from blogs.models import NewsletterJob, NewsletterDelivery
+
+    with transaction.atomic():
+        job = NewsletterJob.objects.create(
+            kind=NewsletterJob.KIND_WELCOME,
+            subject=f"Welcome to {getattr(settings, 'SITE_NAME', 'My Blog')}",
+            total_count=1,
+        )
+        NewsletterDelivery.objects.create(job=job, email=email, name=name or '')
+    return job
+
+
+# ---------------------------------------
+# WELCOME EMAIL
+# ---------------------------------------
+def get_latest_posts_fragments():
+    """
+    (text, html) "Latest Articles" blocks for the welcome email. Rendered
+    once and kept in the cache until a post changes, so sending welcome
+    emails does not query posts per subscriber.
+    """
+    fragments = cache.get(LATEST_POSTS_CACHE_KEY)
+    if fragments is None:
+        from blogs.models import Blogs
+
+        context = {
+            'latest_posts': list(
+                Blogs.objects.filter(status='published').order_by('-created_at').only('title', 'slug')[:3]
+            ),
+            'domain': getattr(settings, 'DOMAIN', 'http://127.0.0.1:8000/'),
+        }
+        fragments = (
+            render_to_string('newsletter/latest_posts.txt', context),
+            render_to_string('newsletter/latest_posts.html', context),
+        )
+        cache.set(LATEST_POSTS_CACHE_KEY, fragments, newsletter_setting('LATEST_POSTS_TTL', 60 * 60))
+    return fragments
+
+
+def invalidate_latest_posts():
+    cache.delete(LATEST_POSTS_CACHE_KEY)
+
+
+def render_welcome_email(name, email):
+    """(text_body, html_body) of the welcome email for one subscriber."""
+    latest_posts_text, latest_posts_html = get_latest_posts_fragments()
+    context = {
+        'name': name or 'Subscriber',
+        'email': email,
+        'site_name': getattr(settings, 'SITE_NAME', 'My Blog'),
+        'domain': getattr(settings, 'DOMAIN', 'http://127.0.0.1:8000/'),
+        'latest_posts_text': mark_safe(latest_posts_text),
+        'latest_posts_html': mark_safe(latest_posts_html),
+        'now': timezone.now(),
+    }
+    return (
+        render_to_string('newsletter/welcome_email.txt', context),
+        render_to_string('newsletter/welcome_email.html', context),
+    )
+
+
+# ---------------------------------------
+# DELIVERY
+# ---------------------------------------
+def retry_delay(attempts):
+    """Exponential backoff: NEWSLETTER_RETRY_BACKOFF seconds, doubled per failed attempt, capped at a day."""
+    base = newsletter_setting('RETRY_BACKOFF', 60)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 24 * 60 * 60))
+
+
+def build_message(delivery, connection):
+    job = delivery.job
+    if job.kind == job.KIND_WELCOME:
+        text_body, html_body = render_welcome_email(delivery.name, delivery.email)
+    else:
+        text_body, html_body = job.text_body, job.html_body
+
+    msg = EmailMultiAlternatives(
+        subject=job.subject,
+        body=text_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[delivery.email],
+        connection=connection,
+    )
+    if html_body:
+        msg.attach_alternative(html_body, "text/html")
+    return msg
+
+
+class RateLimiter:
+    """Spaces calls so no more than `rate` happen per second (0 = unlimited)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self._next:
+            time.sleep(self._next - now)
+        self._next = max(now, self._next) + self.interval
+
+
+def claim_deliveries(limit):
+    """
+    Take up to `limit` due deliveries for this worker: their next_attempt_at
+    is pushed NEWSLETTER_CLAIM_TIMEOUT ahead in the same transaction, so
+    other workers skip them. If the worker dies, whatever it had not sent
+    is due again once the claim runs out.
+    """
+    from blogs.models import NewsletterDelivery
+
+    now = timezone.now()
+    with transaction.atomic():
+        pks = list(
+            NewsletterDelivery.objects
+            .filter(status=NewsletterDelivery.STATUS_PENDING, next_attempt_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at', 'pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+        claimed_until = now + timedelta(seconds=newsletter_setting('CLAIM_TIMEOUT', 15 * 60))
+        NewsletterDelivery.objects.filter(pk__in=pks).update(next_attempt_at=claimed_until)
+    return list(NewsletterDelivery.objects.filter(pk__in=pks).select_related('job').order_by('pk'))
+
+
+def send_batch(deliveries, connection, rate_limiter, max_attempts):
+    """
+    Send each delivery as its own message over one open connection, so a bad
+    address only fails its own row. Each result is saved as soon as it is
+    known, so an interrupted worker never sends a delivery twice.
+    """
+    from blogs.models import NewsletterDelivery
+
+    try:
+        for delivery in deliveries:
+            rate_limiter.wait()
+            delivery.attempts += 1
+            try:
+                # No-op while the connection is up; reconnects after a failure
+                connection.open()
+                connection.send_messages([build_message(delivery, connection)])
+            except Exception as e:
+                connection.close()
+                delivery.last_error = str(e)[:1000]
+                if delivery.attempts >= max_attempts:
+                    delivery.status = NewsletterDelivery.STATUS_FAILED
+                else:
+                    delivery.next_attempt_at = timezone.now() + retry_delay(delivery.attempts)
+                logger.warning("Newsletter delivery to %s failed (attempt %s): %s", delivery.email, delivery.attempts, e)
+            else:
+                delivery.status = NewsletterDelivery.STATUS_SENT
+                delivery.sent_at = timezone.now()
+                delivery.last_error = ''
+            delivery.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'])
+    finally:
+        update_job_progress({delivery.job_id for delivery in deliveries})
+
+
+def update_job_progress(job_ids):
+    """Refresh the sent/failed counters of the given jobs and close the finished ones."""
+    from blogs.models import NewsletterJob, NewsletterDelivery
+
+    counts = (
+        NewsletterDelivery.objects.filter(job_id__in=job_ids)
+        .values('job_id')
+        .annotate(
+            sent=Count('pk', filter=Q(status=NewsletterDelivery.STATUS_SENT)),
+            failed=Count('pk', filter=Q(status=NewsletterDelivery.STATUS_FAILED)),
+            pending=Count('pk', filter=Q(status=NewsletterDelivery.STATUS_PENDING)),
+        )
+    )
+    for row in counts:
+        fields = {'sent_count': row['sent'], 'failed_count': row['failed']}
+        if row['pending']:
+            fields['status'] = NewsletterJob.STATUS_SENDING
+        else:
+            fields['status'] = NewsletterJob.STATUS_DONE
+            fields['finished_at'] = timezone.now()
+        NewsletterJob.objects.filter(pk=row['job_id']).update(**fields)
+
+
+def process_outbox(batch_size=None, rate=None, max_attempts=None, max_batches=None):
+    """
+    Send every delivery that is currently due, batch_size at a time, reusing
+    one SMTP connection. Returns the number of deliveries attempted.
+    """
+    batch_size = batch_size or newsletter_setting('BATCH_SIZE', 50)
+    rate = newsletter_setting('RATE_LIMIT', 5) if rate is None else rate
+    max_attempts = max_attempts or newsletter_setting('MAX_ATTEMPTS', 5)
+
+    rate_limiter = RateLimiter(rate)
+    attempted = batches = 0
+    connection = None
+    try:
+        while max_batches is None or batches < max_batches:
+            deliveries = claim_deliveries(batch_size)
+            if not deliveries:
+                break
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+            send_batch(deliveries, connection, rate_limiter, max_attempts)
+            attempted += len(deliveries)
+            batches += 1
+    finally:
+        if connection is not None:
+            connection.close()
+    return attempted
@@ -0,0 +1,133 @@
+# blogs/utils/page_cache.py
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+PAGE_KEY_PREFIX = 'page:'
+TAG_KEY_PREFIX = 'page-tag:'
+
+# Every cached page shows the category navigation and the social links
+BASE_TAGS = ('categories', 'social')
+
+# Cacheable routes (by URL name) and the tags their content depends on.
+# Views add object-specific tags with add_page_cache_tags().
+CACHEABLE_ROUTES = {
+    'home': ('posts',),
+    'category_list': ('posts',),
+    'posts_by_category': ('posts',),
+    'blog_detail': ('posts',),
+    'privacy': (),
+    'terms': (),
+    'cookie_policy': (),
+    'disclaimer': (),
+    'about': (),
+    # Sitemap index and its paged sections
+    'django.contrib.sitemaps.views.index': ('posts', 'legal'),
+    'django.contrib.sitemaps.views.sitemap': ('posts', 'legal'),
+}
+
+DEFAULT_IGNORED_PARAMS = (
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga',
+)
+
+
+def page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'pages')]
+
+
+def ignored_params():
+    return frozenset(getattr(settings, 'PAGE_CACHE_IGNORED_PARAMS', DEFAULT_IGNORED_PARAMS))
+
+
+def strip_tracking_params(query_dict):
+    """A copy of the query dict without tracking parameters, or None if there were none."""
+    ignored = ignored_params()
+    if not any(key in ignored for key in query_dict):
+        return None
+    cleaned = query_dict.copy()
+    for key in ignored:
+        cleaned.pop(key, None)
+    return cleaned
+
+
+def page_cache_key(request):
+    """Cache key from host, path and the sorted (tracking-free) query string."""
+    ignored = ignored_params()
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists() if key not in ignored
+        for value in values
+    )
+    url = f"{request.get_host()}{request.path}?{urlencode(params)}"
+    return PAGE_KEY_PREFIX + hashlib.md5(url.encode('utf-8')).hexdigest()
+
+
+# ---------------------------------------
+# TAG VERSIONS
+# ---------------------------------------
+def get_tag_versions(tags):
+    """Current version of each tag; tags that were never bumped get one now."""
+    cache = page_cache()
+    keys = {TAG_KEY_PREFIX + tag: tag for tag in tags}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update({keys[key]: version for key, version in missing.items()})
+    return versions
+
+
+def bump_page_cache_tags(*tags):
+    """Invalidate every cached page that depends on any of the tags."""
+    version = time.time_ns()
+    page_cache().set_many({TAG_KEY_PREFIX + tag: version for tag in tags}, timeout=None)
+
+
+def add_page_cache_tags(request, *tags):
+    """Called by views to make the cached copy of this page depend on extra tags (e.g. one post)."""
+    state = getattr(request, 'page_cache', None)
+    if state is not None:
+        state.tags.update(tags)
+
+
+# ---------------------------------------
+# ENTRIES
+# ---------------------------------------
+class PageCacheState:
+    """Per-request bookkeeping attached to cacheable requests as request.page_cache."""
+
+    def __init__(self, key, tags):
+        self.key = key
+        self.tags = set(tags)
+        self.versions = get_tag_versions(self.tags)
+        self.hit = False
+
+    def load(self):
+        """The cached response for this page, or None if missing or stale."""
+        entry = page_cache().get(self.key)
+        if entry is None:
+            return None
+        if get_tag_versions(entry['tags']) != entry['tags']:
+            return None
+        response = HttpResponse(entry['content'], status=entry['status'])
+        for header, value in entry['headers']:
+            response[header] = value
+        return response
+
+    def store(self, response):
+        # Versions of the route's tags were taken before rendering, so a
+        # bump that races with the render still invalidates this copy
+        extra_tags = self.tags - set(self.versions)
+        versions = {**self.versions, **get_tag_versions(extra_tags)}
+        page_cache().set(self.key, {
+            'tags': versions,
+            'status': response.status_code,
+            'content': response.content,
+            'headers': list(response.items()),
+        }, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
@@ -0,0 +1,95 @@
+# blogs/utils/pagination.py
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+
+def boundaries_version():
+    from blogs.models import PostListVersion
+
+    return PostListVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def invalidate_page_boundaries():
+    """Called whenever posts change, so every process rebuilds its cached boundary tables on next use."""
+    from blogs.models import PostListVersion
+
+    if not PostListVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        PostListVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+class KeysetPage(Page):
+    """A Page that also exposes a windowed page range for templates."""
+
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(self.number, on_each_side=2, on_ends=1)
+
+
+class KeysetPaginator(Paginator):
+    """
+    Paginator for post listings ordered newest first that seeks instead of
+    counting and offsetting.
+
+    Pages are fetched with WHERE (created_at, id) <= (boundary) ORDER BY
+    created_at DESC, id DESC LIMIT per_page, which the listing indexes
+    (status, is_featured, created_at) serve directly, so page 500 costs the
+    same as page 1. Page-number URLs keep working through a boundary table:
+    the (created_at, id) key of the first row of every page, built from a
+    single scan of the key columns and cached under `cache_key` and the
+    PostListVersion, which every post change bumps (see blogs.signals). The
+    count comes from the same table. Page 1 needs no boundary, so it always
+    shows the newest posts.
+    """
+
+    def __init__(self, object_list, per_page, cache_key=None, **kwargs):
+        super().__init__(object_list.order_by('-created_at', '-id'), per_page, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def _table(self):
+        if self.cache_key is None:
+            return self._build_table()
+        key = f'keyset:{self.cache_key}:{self.per_page}:{boundaries_version()}'
+        table = cache.get(key)
+        if table is None:
+            table = self._build_table()
+            cache.set(key, table, getattr(settings, 'KEYSET_BOUNDARIES_TTL', 600))
+        return table
+
+    def _build_table(self):
+        count = 0
+        boundaries = []
+        for count, row in enumerate(self.object_list.values_list('created_at', 'id').iterator(), start=1):
+            if count % self.per_page == 1 or self.per_page == 1:
+                boundaries.append(row)
+        return {'count': count, 'boundaries': boundaries}
+
+    @cached_property
+    def count(self):
+        return self._table['count']
+
+    def page(self, number):
+        number = self.validate_number(number)
+        # The last page may hold orphans of the page after it
+        limit = self.per_page
+        if number == self.num_pages:
+            limit += self.orphans
+        if number == 1:
+            # Straight from the index, not from a cached boundary: with a
+            # per-process cache, other workers' tables miss new posts until
+            # they expire, and page 1 is where new posts appear
+            return self._get_page(list(self.object_list[:limit]), number, self)
+
+        created_at, pk = self._table['boundaries'][number - 1]
+        # (created_at, id) <= boundary, written with a plain range on
+        # created_at so the database can seek into the index
+        rows = self.object_list.filter(
+            Q(created_at__lt=created_at) | Q(id__lte=pk), created_at__lte=created_at,
+        )
+        return self._get_page(list(rows[:limit]), number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return KeysetPage(*args, **kwargs)
@@ -0,0 +1,178 @@
+# blogs/utils/profiling.py
+import functools
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger('blogs.performance')
+
+_current_profile = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Queries and time spent in the database and in templates during one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+@contextmanager
+def profile_request():
+    profile = RequestProfile()
+    token = _current_profile.set(profile)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def install_template_timer():
+    """
+    Time Template.render() for the profiled requests. Only the outermost
+    render is counted, so {% include %} and {% extends %} are not counted
+    twice; queries run by lazy querysets while rendering are included.
+    """
+    from django.template.base import Template
+
+    if getattr(Template.render, 'profiled', False):
+        return
+    original_render = Template.render
+
+    @functools.wraps(original_render)
+    def render(self, context):
+        profile = _current_profile.get()
+        if profile is None or profile.rendering:
+            return original_render(self, context)
+        profile.rendering = True
+        start = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            profile.rendering = False
+            profile.template_time += time.perf_counter() - start
+
+    render.profiled = True
+    Template.render = render
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+
+class RequestStats:
+    """
+    Ring buffer of the last PERFORMANCE_BUFFER_SIZE profiled requests of
+    this process. Each worker process keeps its own, so the report covers
+    the worker that serves it; restarting the process empties it. The size
+    and the budgets are read from settings on every use.
+    """
+
+    def __init__(self):
+        self._records = deque(maxlen=self.size)
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return getattr(settings, 'PERFORMANCE_BUFFER_SIZE', 5000)
+
+    @property
+    def query_budget(self):
+        return getattr(settings, 'PERFORMANCE_QUERY_BUDGET', None)
+
+    @property
+    def time_budget(self):
+        return getattr(settings, 'PERFORMANCE_TIME_BUDGET_MS', None)
+
+    def over_budget(self, queries, total_ms):
+        query_budget, time_budget = self.query_budget, self.time_budget
+        return (
+            (query_budget is not None and queries > query_budget)
+            or (time_budget is not None and total_ms > time_budget)
+        )
+
+    def record(self, view_name, method, path, status, profile, total_time):
+        entry = {
+            'time': timezone.now(),
+            'view': view_name,
+            'method': method,
+            'path': path,
+            'status': status,
+            'queries': profile.queries,
+            'db_ms': profile.db_time * 1000,
+            'template_ms': profile.template_time * 1000,
+            'total_ms': total_time * 1000,
+        }
+        entry['slow'] = self.over_budget(entry['queries'], entry['total_ms'])
+        size = self.size
+        with self._lock:
+            if self._records.maxlen != size:
+                self._records = deque(self._records, maxlen=size)
+            self._records.append(entry)
+        if entry['slow']:
+            logger.warning(
+                "%s %s (%s) over budget: %d queries, %.1f ms total, %.1f ms DB, %.1f ms templates",
+                method, path, view_name, entry['queries'], entry['total_ms'], entry['db_ms'], entry['template_ms'],
+            )
+        return entry
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self):
+        """Per-view count and p50/p95/p99 of each measure, slowest p95 first."""
+        by_view = defaultdict(list)
+        for entry in self.records():
+            by_view[entry['view']].append(entry)
+
+        views = []
+        for view_name, entries in by_view.items():
+            row = {'view': view_name, 'count': len(entries), 'slow': sum(entry['slow'] for entry in entries)}
+            for measure in ('queries', 'db_ms', 'template_ms', 'total_ms'):
+                values = sorted(entry[measure] for entry in entries)
+                row[measure] = {
+                    'p50': percentile(values, 0.50),
+                    'p95': percentile(values, 0.95),
+                    'p99': percentile(values, 0.99),
+                    'max': values[-1],
+                }
+            views.append(row)
+        views.sort(key=lambda row: row['total_ms']['p95'], reverse=True)
+        return views
+
+    def slowest(self, limit=20):
+        """Most recent requests over the query or time budget."""
+        return [entry for entry in reversed(self.records()) if entry['slow']][:limit]
+
+
+request_stats = RequestStats()
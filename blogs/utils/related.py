@@ -0,0 +1,365 @@
+# blogs/utils/related.py
+import logging
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .html import html_to_text
+from .page_cache import bump_page_cache_tags
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'[^\W\d_]{2,}')
+
+# Title words say more about a post than body words
+FIELD_WEIGHTS = (('title', 3), ('short_description', 2), ('body', 1))
+
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how however if in into is it its itself just me more
+most my myself no nor not now of off on once only or other our ours ourselves out over own same she
+should so some such than that the their theirs them themselves then there these they this those
+through to too under until up us very was we were what when where which while who whom why will with
+would you your yours yourself yourselves
+""".split())
+
+DEFAULT_NEIGHBOURS = 6
+DEFAULT_MAX_FEATURES = 4096
+DEFAULT_CATEGORY_BOOST = 0.05
+DEFAULT_BATCH_SIZE = 256
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def index_path():
+    return str(_setting('RELATED_POSTS_INDEX_PATH', os.path.join(settings.BASE_DIR, 'related_posts.npz')))
+
+
+@contextmanager
+def index_lock(path):
+    """
+    Exclusive lock on the index file across processes, held from load to
+    save so concurrent saves cannot drop each other's changes.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def document_terms(title, short_description, blog_body):
+    """Weighted term counts of a post."""
+    fields = {'title': title, 'short_description': short_description, 'body': html_to_text(blog_body or '')}
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in TOKEN_RE.findall((fields[field] or '').lower()):
+            if token not in STOP_WORDS:
+                counts[token] += weight
+    return counts
+
+
+def published_documents(ids=None):
+    """(pk, category_id, term counts) of published posts, streamed."""
+    from blogs.models import Blogs
+
+    posts = Blogs.objects.published()
+    if ids is not None:
+        posts = posts.filter(pk__in=ids)
+    rows = posts.order_by('pk').values_list('pk', 'category_id', 'title', 'short_description', 'blog_body')
+    for pk, category_id, title, short_description, blog_body in rows.iterator(chunk_size=500):
+        yield pk, category_id, document_terms(title, short_description, blog_body)
+
+
+class RelatedIndex:
+    """
+    TF-IDF vectors of every published post (rows L2-normalised, float32),
+    with the vocabulary and IDF weights they were built with. Saved as a
+    .npz file so a saved post can be re-vectorised and compared without
+    re-reading the corpus.
+    """
+
+    def __init__(self, ids, categories, vocabulary, idf, vectors):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.categories = np.asarray(categories, dtype=np.int64)
+        self.vocabulary = list(vocabulary)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+        self.term_index = {term: column for column, term in enumerate(self.vocabulary)}
+        self.positions = {int(pk): row for row, pk in enumerate(self.ids)}
+
+    @classmethod
+    def build(cls, documents, max_features=None):
+        max_features = max_features or _setting('RELATED_POSTS_MAX_FEATURES', DEFAULT_MAX_FEATURES)
+        documents = list(documents)
+        ids = [pk for pk, _category, _terms in documents]
+        categories = [category if category is not None else -1 for _pk, category, _terms in documents]
+
+        # Keep the terms shared by at least two posts, most widespread first;
+        # terms in nearly every post carry no signal either
+        document_frequency = Counter()
+        for _pk, _category, terms in documents:
+            document_frequency.update(terms.keys())
+        total = len(documents)
+        candidates = [
+            (frequency, term) for term, frequency in document_frequency.items()
+            if frequency >= 2 and (total < 10 or frequency <= 0.8 * total)
+        ]
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        vocabulary = [term for _frequency, term in candidates[:max_features]]
+        frequencies = np.array([document_frequency[term] for term in vocabulary], dtype=np.float32)
+        idf = np.log((1 + total) / (1 + frequencies)) + 1
+
+        index = cls(ids, categories, vocabulary, idf, np.zeros((total, len(vocabulary)), dtype=np.float32))
+        for row, (_pk, _category, terms) in enumerate(documents):
+            index.vectors[row] = index.vectorize(terms)
+        return index
+
+    def vectorize(self, terms):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        columns, counts = [], []
+        for term, count in terms.items():
+            column = self.term_index.get(term)
+            if column is not None:
+                columns.append(column)
+                counts.append(count)
+        if columns:
+            # Sublinear term frequency, so long posts don't dominate
+            vector[columns] = (1 + np.log(np.asarray(counts, dtype=np.float32))) * self.idf[columns]
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector /= norm
+        return vector
+
+    def upsert(self, pk, category_id, terms):
+        """Add or replace one post's vector (with the current vocabulary). Returns its row."""
+        vector = self.vectorize(terms)
+        category = category_id if category_id is not None else -1
+        row = self.positions.get(pk)
+        if row is None:
+            row = len(self.ids)
+            self.ids = np.append(self.ids, pk)
+            self.categories = np.append(self.categories, category)
+            self.vectors = np.vstack([self.vectors, vector[np.newaxis, :]])
+            self.positions[pk] = row
+        else:
+            self.categories[row] = category
+            self.vectors[row] = vector
+        return row
+
+    def retain(self, pks):
+        """Drop the posts not in `pks` (deleted or unpublished since the index was saved)."""
+        keep = np.isin(self.ids, np.fromiter(pks, dtype=np.int64))
+        if not keep.all():
+            self.ids = self.ids[keep]
+            self.categories = self.categories[keep]
+            self.vectors = self.vectors[keep]
+            self.positions = {int(pk): row for row, pk in enumerate(self.ids)}
+
+    def neighbours(self, rows, k, batch_size=None):
+        """
+        {post pk: [(related pk, score), ...]} with the k best matches of each
+        row, computed batch by batch as one matrix product against the corpus.
+        """
+        boost = _setting('RELATED_POSTS_CATEGORY_BOOST', DEFAULT_CATEGORY_BOOST)
+        batch_size = batch_size or _setting('RELATED_POSTS_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        rows = np.asarray(rows, dtype=np.int64)
+        total = len(self.ids)
+        k = min(k, total - 1)
+        result = {}
+        if k <= 0:
+            return {int(self.ids[row]): [] for row in rows}
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            scores = self.vectors[batch] @ self.vectors.T
+            # Nothing in common means not related, whatever the category
+            related = scores > 0
+            same_category = (self.categories[batch][:, np.newaxis] == self.categories[np.newaxis, :])
+            same_category &= self.categories[np.newaxis, :] >= 0
+            scores = scores + boost * same_category
+            scores[~related] = -np.inf
+            scores[np.arange(len(batch)), batch] = -np.inf
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for row, columns, values in zip(batch, top, top_scores):
+                result[int(self.ids[row])] = [
+                    (int(self.ids[column]), float(value))
+                    for column, value in zip(columns, values) if np.isfinite(value)
+                ]
+        return result
+
+    def save(self, path):
+        temp_path = f'{path}.tmp.npz'
+        np.savez_compressed(
+            temp_path, ids=self.ids, categories=self.categories,
+            vocabulary=np.array(self.vocabulary, dtype=str), idf=self.idf, vectors=self.vectors,
+        )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(data['ids'], data['categories'], data['vocabulary'].tolist(), data['idf'], data['vectors'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def store_neighbours(neighbours, replace_all=False):
+    """Replace the RelatedPost rows of the given posts in one transaction."""
+    from blogs.models import RelatedPost
+
+    links = [
+        RelatedPost(post_id=pk, related_id=related_pk, rank=rank, score=score)
+        for pk, related in neighbours.items()
+        for rank, (related_pk, score) in enumerate(related, start=1)
+    ]
+    with transaction.atomic():
+        existing = RelatedPost.objects.all() if replace_all else RelatedPost.objects.filter(post_id__in=list(neighbours))
+        existing.delete()
+        RelatedPost.objects.bulk_create(links, batch_size=500)
+    return len(links)
+
+
+def rebuild_related_posts(k=None, max_features=None, batch_size=None):
+    """Recompute every post's neighbours from the whole corpus. Returns (posts, links)."""
+    from blogs.models import RelatedPostsUpdate
+
+    k = k or _setting('RELATED_POSTS_COUNT', DEFAULT_NEIGHBOURS)
+    path = index_path()
+    with index_lock(path):
+        started = timezone.now()
+        index = RelatedIndex.build(published_documents(), max_features)
+        neighbours = index.neighbours(range(len(index.ids)), k, batch_size)
+        links = store_neighbours(neighbours, replace_all=True)
+        index.save(path)
+        # Covered by the rebuild
+        RelatedPostsUpdate.objects.filter(queued_at__lte=started).delete()
+    bump_page_cache_tags('posts')
+    return len(index.ids), links
+
+
+def queue_related_posts_update(post_id, linked_from=()):
+    """
+    Mark a saved or deleted post for the update_related_posts worker. One
+    small write: the index is only loaded and saved by the worker, once per
+    batch of queued posts.
+    """
+    from blogs.models import RelatedPostsUpdate
+
+    with transaction.atomic():
+        update, created = RelatedPostsUpdate.objects.get_or_create(
+            post_id=post_id, defaults={'linked_from': sorted(set(linked_from))},
+        )
+        if not created:
+            # Bumps queued_at, so a worker busy with the older entry keeps this one
+            update.linked_from = sorted(set(update.linked_from) | set(linked_from))
+            update.save()
+
+
+def _worst_scores(post_ids):
+    """{post_id: (lowest stored score, number of related posts)} of the given posts."""
+    from blogs.models import RelatedPost
+
+    post_ids = list(post_ids)
+    lists = {}
+    for start in range(0, len(post_ids), 500):
+        for entry in (
+            RelatedPost.objects.filter(post_id__in=post_ids[start:start + 500])
+            .values('post_id').annotate(worst=Min('score'), size=Count('id'))
+        ):
+            lists[entry['post_id']] = (entry['worst'], entry['size'])
+    return lists
+
+
+def update_related_posts(limit=None):
+    """
+    Apply the queued updates (see queue_related_posts_update): re-vectorise
+    each queued post, then recompute its neighbours and those of the posts
+    it may now enter (or leave) the top-k of. The vocabulary stays fixed
+    until the next rebuild. Returns the number of queued posts handled.
+    """
+    from blogs.models import RelatedPostsUpdate
+
+    queued = list(RelatedPostsUpdate.objects.order_by('queued_at')[:limit or None])
+    if not queued:
+        return 0
+
+    path = index_path()
+    with index_lock(path):
+        index = RelatedIndex.load(path)
+        if index is None:
+            logger.info("No related posts index at %s; run manage.py build_related_posts", path)
+            neighbours = {}
+        else:
+            neighbours = _apply_updates(index, queued)
+            index.save(path)
+        # Entries queued again meanwhile (newer queued_at) stay for the next run
+        done = Q()
+        for update in queued:
+            done |= Q(pk=update.pk, queued_at=update.queued_at)
+        RelatedPostsUpdate.objects.filter(done).delete()
+
+    if neighbours:
+        bump_page_cache_tags(*(f'blog:{pk}' for pk in neighbours))
+    return len(queued)
+
+
+def _apply_updates(index, queued):
+    from blogs.models import Blogs, RelatedPost
+
+    k = _setting('RELATED_POSTS_COUNT', DEFAULT_NEIGHBOURS)
+    post_ids = {update.post_id for update in queued}
+    # Drops the queued posts that were deleted or unpublished, and any the
+    # file still holds from before other deletions or from another database
+    index.retain(Blogs.objects.published().values_list('pk', flat=True))
+
+    affected = {pk for update in queued for pk in update.linked_from}
+    affected.update(RelatedPost.objects.filter(related_id__in=post_ids).values_list('post_id', flat=True))
+    neighbours = {pk: [] for pk in post_ids}
+    rows = [index.upsert(*document) for document in published_documents(post_ids)]
+
+    if rows:
+        # Posts whose worst neighbour scores below one of the updated posts could take it in
+        boost = _setting('RELATED_POSTS_CATEGORY_BOOST', DEFAULT_CATEGORY_BOOST)
+        scores = (index.vectors @ index.vectors[rows].T).max(axis=1)
+        candidates = {
+            int(index.ids[row]): float(scores[row]) for row in np.flatnonzero(scores > 0)
+            if int(index.ids[row]) not in post_ids
+        }
+        lists = _worst_scores(candidates)
+        for other, score in candidates.items():
+            worst, size = lists.get(other, (None, 0))
+            if size < k or score + boost >= worst:
+                affected.add(other)
+
+    affected -= post_ids
+    rows += [index.positions[pk] for pk in affected if pk in index.positions]
+    neighbours.update(index.neighbours(rows, k))
+    store_neighbours(neighbours)
+    return neighbours
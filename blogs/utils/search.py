@@ -0,0 +1,170 @@
+# blogs/utils/search.py
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from .html import html_to_text
+
+SEARCH_TABLE = 'blogs_search_index'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(keyword):
+    """Split a raw search string into lowercase word tokens."""
+    return TOKEN_RE.findall((keyword or '').lower())
+
+
+class BaseSearchBackend:
+    """
+    Interface every search backend implements.
+    `search()` returns published post ids ordered by relevance (best first).
+    """
+    max_results = 500
+
+    def __init__(self):
+        self.max_results = getattr(settings, 'SEARCH_MAX_RESULTS', self.max_results)
+
+    def index(self, post):
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        raise NotImplementedError
+
+    def search(self, keyword):
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Re-index every published post. Returns the number of indexed posts."""
+        from blogs.models import Blogs, STATUS_PUBLISHED
+
+        self.clear()
+        count = 0
+        for post in Blogs.objects.filter(status=STATUS_PUBLISHED).only(
+            'id', 'title', 'short_description', 'blog_body', 'status'
+        ).iterator(chunk_size=200):
+            self.index(post)
+            count += 1
+        return count
+
+    def clear(self):
+        pass
+
+    def latest_ids(self):
+        """Results for an empty query: every published post, newest first."""
+        from blogs.models import Blogs, STATUS_PUBLISHED
+
+        return list(
+            Blogs.objects.filter(status=STATUS_PUBLISHED)
+            .order_by('-created_at')
+            .values_list('id', flat=True)[:self.max_results]
+        )
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Inverted index backed by an SQLite FTS5 virtual table (see migration 0020).
+    Only published posts are indexed and HTML is stripped before indexing.
+    """
+    # bm25() column weights: title, short_description, body
+    weights = (10.0, 4.0, 1.0)
+
+    def index(self, post):
+        from blogs.models import STATUS_PUBLISHED
+
+        if post.status != STATUS_PUBLISHED:
+            self.remove(post.pk)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, short_description, body) '
+                f'VALUES (%s, %s, %s, %s)',
+                [post.pk, post.title, post.short_description, html_to_text(post.blog_body)],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def build_match(self, tokens):
+        # Quote every token so FTS operators typed by users are treated as text,
+        # and allow prefix matches ("djang" finds "django").
+        return ' '.join('"%s"*' % token.replace('"', '') for token in tokens)
+
+    def search(self, keyword):
+        tokens = tokenize(keyword)
+        if not tokens:
+            return self.latest_ids()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+                f'ORDER BY bm25({SEARCH_TABLE}, %s, %s, %s) LIMIT %s',
+                [self.build_match(tokens), *self.weights, self.max_results],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Portable fallback for databases without an FTS backend configured.
+    Every token must match somewhere; title hits rank above description and body hits.
+    """
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, keyword):
+        from blogs.models import Blogs, STATUS_PUBLISHED
+
+        tokens = tokenize(keyword)
+        if not tokens:
+            return self.latest_ids()
+
+        filters = Q()
+        rank = Value(0)
+        for token in tokens:
+            filters &= (
+                Q(title__icontains=token)
+                | Q(short_description__icontains=token)
+                | Q(blog_body__icontains=token)
+            )
+            rank = rank + Case(
+                When(title__icontains=token, then=Value(3)),
+                When(short_description__icontains=token, then=Value(2)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+
+        return list(
+            Blogs.objects.filter(filters, status=STATUS_PUBLISHED)
+            .annotate(rank=rank)
+            .order_by('-rank', '-created_at')
+            .values_list('id', flat=True)[:self.max_results]
+        )
+
+
+def get_search_backend():
+    """
+    Return the configured search backend.
+    settings.SEARCH_BACKEND may hold a dotted path; otherwise SQLite uses FTS5
+    and other databases use the portable fallback.
+    """
+    backend_path = getattr(settings, 'SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return DatabaseSearchBackend()
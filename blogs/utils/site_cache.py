@@ -0,0 +1,85 @@
+# blogs/utils/site_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+CATEGORIES_KEY = 'sidebar_categories'
+SOCIAL_LINKS_KEY = 'social_media_links'
+
+
+class TTLCache:
+    """
+    Small thread-safe, process-local cache with per-entry expiry and LRU eviction.
+    Used for site-wide lists that every page renders (categories, social links).
+    """
+
+    def __init__(self, ttl=60, maxsize=128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, loader, ttl=None):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+site_cache = TTLCache(
+    ttl=getattr(settings, 'SITE_CACHE_TTL', 60),
+    maxsize=getattr(settings, 'SITE_CACHE_MAXSIZE', 128),
+)
+
+
+def get_sidebar_categories():
+    """All categories annotated with published post counts, shared by views and context processors."""
+    from blogs.models import Category
+
+    return site_cache.get_or_set(CATEGORIES_KEY, lambda: list(Category.objects.with_post_count()))
+
+
+def get_social_media_links():
+    from blogs.models import SocialMedia
+
+    return site_cache.get_or_set(SOCIAL_LINKS_KEY, lambda: list(SocialMedia.objects.filter(is_active=True)))
+
+
+def invalidate_categories():
+    site_cache.delete(CATEGORIES_KEY)
+
+
+def invalidate_social_media_links():
+    site_cache.delete(SOCIAL_LINKS_KEY)
@@ -1,62 +1,52 @@
 # views.py
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Q
 from .models import Blogs, Category, Comment, LegalPage, Advertisement, NewsletterSubscriber
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.http import HttpResponseRedirect, JsonResponse, HttpResponseForbidden
 from django.contrib import messages
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
 from django.conf import settings
-from django.utils import timezone
 from .forms import ContactForm, WriteForUsForm 
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
 from .utils.breadcrumbs import Breadcrumb  # Import Breadcrumb class
-
+from .utils.comments import comment_page, serialize_comment
+from .utils.newsletter import enqueue_custom_newsletter, enqueue_welcome_email
+from .utils.ad_counters import normalize_category, normalize_placement, record_click, record_impression
+from .utils.ad_engine import get_ad_index
+from .utils.conditional import (
+    conditional_page, home_freshness, category_freshness, blog_detail_freshness, legal_page_freshness,
+)
+from .utils.page_cache import add_page_cache_tags
+from .utils.pagination import KeysetPaginator
+from .utils.search import get_search_backend
+from .utils.site_cache import get_sidebar_categories
+
+@conditional_page(home_freshness)
 def home(request):
     # Featured posts (Hero + Featured Grid)
-    featured_posts = Blogs.objects.filter(
-        status='published', 
-        is_featured=True
-    ).select_related('category', 'author').order_by('-created_at')
+    featured_posts = Blogs.objects.published().cards().filter(is_featured=True).order_by('-created_at')
 
     # Regular posts (paginated)
-    regular_posts_qs = Blogs.objects.filter(
-        status='published', 
-        is_featured=False
-    ).select_related('category', 'author').order_by('-created_at')
+    regular_posts_qs = Blogs.objects.published().cards().filter(is_featured=False)
 
-    paginator = Paginator(regular_posts_qs, 10)  # Show 10 posts per page
+    paginator = KeysetPaginator(regular_posts_qs, 10, cache_key='home')  # Show 10 posts per page
     page = request.GET.get('page')
     regular_posts = paginator.get_page(page)
 
-    # Categories for sidebar
-    categories = Category.objects.all()
+    # Categories for sidebar (shared with the get_categories context processor)
+    categories = get_sidebar_categories()
 
     # Popular posts (based on views or created_at fallback)
-    popular_posts = Blogs.objects.filter(status='published').order_by('-created_at')[:5]
-
-    # Active advertisements
-    now = timezone.now()
-    sidebar_ads = Advertisement.objects.filter(
-        placement_area__in=['SIDEBAR_TOP', 'SIDEBAR_BOTTOM'],
-        is_active=True
-    ).filter(
-        Q(start_date__isnull=True) | Q(start_date__lte=now)
-    ).filter(
-        Q(end_date__isnull=True) | Q(end_date__gte=now)
-    ).order_by('-priority')
-
-    content_ads = Advertisement.objects.filter(
-        placement_area__in=['CONTENT_TOP', 'CONTENT_MIDDLE', 'CONTENT_BOTTOM'],
-        is_active=True
-    ).filter(
-        Q(start_date__isnull=True) | Q(start_date__lte=now)
-    ).filter(
-        Q(end_date__isnull=True) | Q(end_date__gte=now)
-    ).order_by('-priority')
+    popular_posts = Blogs.objects.published().cards().order_by('-created_at')[:5]
+
+    # Active advertisements (served from the in-memory ad index)
+    ad_index = get_ad_index()
+    sidebar_ads = ad_index.eligible_for_placements(['SIDEBAR_TOP', 'SIDEBAR_BOTTOM'])
+    content_ads = ad_index.eligible_for_placements(['CONTENT_TOP', 'CONTENT_MIDDLE', 'CONTENT_BOTTOM'])
 
     # Set breadcrumbs for homepage
     request.breadcrumbs = [
@@ -76,7 +66,7 @@ def home(request):
 
 def category_list(request):
     # Get all categories
-    categories = Category.objects.all()
+    categories = get_sidebar_categories()
     
     # If you want to add pagination for categories (optional)
     # paginator = Paginator(categories, 20)  # Show 20 categories per page
@@ -95,9 +85,10 @@ def category_list(request):
     }
     return render(request, 'blogs/category_list.html', context)
 
+@conditional_page(category_freshness)
 def posts_by_category(request, category_id):
     # Fetch the posts based on the category_id
-    posts = Blogs.objects.filter(status='published', category=category_id).select_related('category', 'author')
+    posts = Blogs.objects.published().cards().filter(category=category_id)
     
     try:
         category = Category.objects.get(pk=category_id)
@@ -105,7 +96,7 @@ def posts_by_category(request, category_id):
         return redirect('home')  # Redirect to home if category not found
     
     # Get all categories for navigation
-    categories = Category.objects.all()
+    categories = get_sidebar_categories()
     
     # Set breadcrumbs for category posts
     request.breadcrumbs = [
@@ -123,8 +114,10 @@ def posts_by_category(request, category_id):
     }
     return render(request, 'posts_by_category.html', context)
 
+@conditional_page(blog_detail_freshness)
 def blog_detail(request, slug):
-    post = get_object_or_404(Blogs, slug=slug, status='published')
+    post = get_object_or_404(Blogs.objects.select_related('category', 'author'), slug=slug, status='published')
+    add_page_cache_tags(request, f'blog:{post.pk}')
     
     # comments
     if request.method == 'POST':
@@ -134,21 +127,20 @@ def blog_detail(request, slug):
        comment.comment = request.POST['comment']
        comment.save()
        return HttpResponseRedirect(request.path_info)
-    comments = Comment.objects.filter(blog=post)
-    comments_count = comments.count()
+    # First page of comments; the rest is loaded from blog_comments
+    comments, next_comments_cursor = comment_page(post.pk)
     
-    categories = Category.objects.all()
-    related_posts = Blogs.objects.filter(
-        category=post.category, 
-        status='published'
-    ).exclude(id=post.id).order_by('-created_at')[:3]
+    categories = get_sidebar_categories()
+    related_posts = post.get_related_posts(limit=3)
     
     # Prepare meta data for SEO
     meta_title = post.meta_title if post.meta_title else post.title
     meta_description = post.meta_description if post.meta_description else post.short_description
     og_title = post.og_title if post.og_title else meta_title
     og_description = post.og_description if post.og_description else meta_description
-    og_image = post.og_image if post.og_image else post.blog_image
+    # Absolute URL of the generated 1200×630 OG image (or the blog image if there is none yet)
+    og_image = post.og_image or post.blog_image
+    og_image_url = request.build_absolute_uri(og_image.url) if og_image else None
     
     # Set breadcrumbs for blog detail
     request.breadcrumbs = [
@@ -165,19 +157,39 @@ def blog_detail(request, slug):
         'meta_description': meta_description,
         'og_title': og_title,
         'og_description': og_description,
-        'og_image': og_image,
+        'og_image': og_image_url,
+        'og_image_width': post.og_image_width if post.og_image else None,
+        'og_image_height': post.og_image_height if post.og_image else None,
+        'twitter_image': og_image_url,
         'twitter_card_type': post.twitter_card_type,
         'twitter_site': post.twitter_site,
         'schema_type': post.schema_type,
         'focus_keyword': post.focus_keyword,
         'comments': comments,
-        'comment_count': comments_count,
+        'comment_count': post.comment_count,
+        'next_comments_cursor': next_comments_cursor,
     }
     return render(request, 'blogs.html', context)
 
+def blog_comments(request, slug):
+    """JSON page of a post's comments after ?cursor=, for the "Load more comments" button."""
+    blog_id = Blogs.objects.published().filter(slug=slug).values_list('pk', flat=True).first()
+    if blog_id is None:
+        return JsonResponse({'error': 'Post not found'}, status=404)
+
+    try:
+        comments, next_cursor = comment_page(blog_id, request.GET.get('cursor'))
+    except ValueError:
+        # Serving the first page instead would make "Load more" repeat comments
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'comments': [serialize_comment(comment) for comment in comments],
+        'next_cursor': next_cursor,
+    })
+
 def blog_list(request):
-    blogs = Blogs.objects.all().order_by('-created_at')  # or your field name
-    paginator = Paginator(blogs, 10)  # show 10 blogs per page
+    blogs = Blogs.objects.cards()
+    paginator = KeysetPaginator(blogs, 10, cache_key='blog_list')  # show 10 blogs per page
 
     page = request.GET.get('page')
     blogs_page = paginator.get_page(page)
@@ -194,15 +206,16 @@ def blog_list(request):
     return render(request, 'blogs/blog_list.html', context)
 
 def search(request):
-    keyword = request.GET.get('keyword', '')
-    blogs = Blogs.objects.filter(
-        Q(title__icontains=keyword) | 
-        Q(short_description__icontains=keyword) | 
-        Q(blog_body__icontains=keyword),
-        status='published'
-    ).select_related('category', 'author')
+    keyword = request.GET.get('keyword', '').strip()
+
+    # Ranked ids come from the search index; only the current page is loaded
+    result_ids = get_search_backend().search(keyword)
+    paginator = Paginator(result_ids, 10)
+    blogs = paginator.get_page(request.GET.get('page'))
+    posts_by_id = Blogs.objects.published().cards().in_bulk(blogs.object_list)
+    blogs.object_list = [posts_by_id[pk] for pk in blogs.object_list if pk in posts_by_id]
     
-    categories = Category.objects.all()
+    categories = get_sidebar_categories()
     
     # Set breadcrumbs for search results
     request.breadcrumbs = [
@@ -224,27 +237,34 @@ def search(request):
 @csrf_exempt
 def record_ad_impression(request, ad_id):
     """Record ad impression"""
-    try:
-        ad = Advertisement.objects.get(id=ad_id)
-        ad.impressions += 1
-        ad.save()
-        return JsonResponse({'status': 'success', 'ad_id': ad_id})
-    except Advertisement.DoesNotExist:
+    default_placement = Advertisement.objects.filter(id=ad_id).values_list('placement_area', flat=True).first()
+    if default_placement is None:
         return JsonResponse({'status': 'error', 'message': 'Ad not found'}, status=404)
+    # Buffered in process and flushed in batches to the totals and hourly rollups
+    record_impression(
+        ad_id,
+        normalize_placement(request.POST.get('placement')) or default_placement,
+        normalize_category(request.POST.get('category')),
+    )
+    return JsonResponse({'status': 'success', 'ad_id': ad_id})
 
 @require_POST
 @csrf_exempt
 def record_ad_click(request, ad_id):
     """Record ad click"""
-    try:
-        ad = Advertisement.objects.get(id=ad_id)
-        ad.clicks += 1
-        ad.save()
-        return JsonResponse({'status': 'success', 'ad_id': ad_id})
-    except Advertisement.DoesNotExist:
+    default_placement = Advertisement.objects.filter(id=ad_id).values_list('placement_area', flat=True).first()
+    if default_placement is None:
         return JsonResponse({'status': 'error', 'message': 'Ad not found'}, status=404)
+    # Buffered in process and flushed in batches to the totals and hourly rollups
+    record_click(
+        ad_id,
+        normalize_placement(request.POST.get('placement')) or default_placement,
+        normalize_category(request.POST.get('category')),
+    )
+    return JsonResponse({'status': 'success', 'ad_id': ad_id})
 
 # Legal Pages View - UPDATED
+@conditional_page(legal_page_freshness)
 def legal_page_detail(request, page_type):
     """
     View for displaying legal pages with proper meta titles and breadcrumbs
@@ -254,6 +274,7 @@ def legal_page_detail(request, page_type):
         page_type=page_type, 
         is_published=True
     )
+    add_page_cache_tags(request, f'legal:{page_type}')
     
     # Set meta title for template
     meta_title = f"{legal_page.title} - Your Blog Name"
@@ -323,16 +344,6 @@ def write_for_us(request):
     return render(request, 'blogs/write_for_us.html', context)
 
 
-# Utility: Get Latest Posts
-# ---------------------------
-def get_latest_posts(limit=3):
-    """Return latest published blog posts."""
-    try:
-        return Blogs.objects.filter(status='published').order_by('-created_at')[:limit]
-    except Exception:
-        return []
-
-
 # ---------------------------
 # Subscribe Newsletter (AJAX)
 # ---------------------------
@@ -340,7 +351,7 @@ def get_latest_posts(limit=3):
 def subscribe_newsletter(request):
     """
     Handle newsletter subscription from frontend.
-    Sends welcome email with recent posts.
+    Queues a welcome email with recent posts.
     """
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request.'})
@@ -351,40 +362,20 @@ def subscribe_newsletter(request):
     if not email:
         return JsonResponse({'success': False, 'message': 'Email is required.'})
 
+    try:
+        validate_email(email)
+    except ValidationError:
+        return JsonResponse({'success': False, 'message': 'Please enter a valid email address.'})
+
     # Check existing subscriber
     if NewsletterSubscriber.objects.filter(email__iexact=email).exists():
         return JsonResponse({'success': False, 'message': 'You are already subscribed.'})
 
-    # Create new subscriber
-    subscriber = NewsletterSubscriber.objects.create(name=name, email=email)
-
-    # Prepare context for welcome email
-    context = {
-        'name': name,
-        'email': email,
-        'site_name': getattr(settings, 'SITE_NAME', 'My Blog'),
-        'domain': getattr(settings, 'DOMAIN', 'http://127.0.0.1:8000/'),
-        'latest_posts': get_latest_posts(3),
-        'now': timezone.now(),
-    }
-
-    subject = f"Welcome to {context['site_name']}"
-    text_body = render_to_string('newsletter/welcome_email.txt', context)
-    html_body = render_to_string('newsletter/welcome_email.html', context)
-
-    # Build email message
-    msg = EmailMultiAlternatives(
-        subject=subject,
-        body=text_body,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[email],
-    )
-    msg.attach_alternative(html_body, "text/html")
-
-    try:
-        msg.send(fail_silently=False)
-    except Exception as e:
-        print("Failed to send welcome email:", e)
+    # Create new subscriber; the welcome email (with recent posts) is sent
+    # by the send_newsletters worker
+    with transaction.atomic():
+        NewsletterSubscriber.objects.create(name=name, email=email)
+        enqueue_welcome_email(email, name)
 
     return JsonResponse({'success': True, 'message': 'Thank you for subscribing! Check your email.'})
 
@@ -411,33 +402,19 @@ def send_custom_newsletter(request):
     if not subject or not message:
         return JsonResponse({'success': False, 'message': 'Subject and message are required.'})
 
-    subscribers = list(NewsletterSubscriber.objects.values_list('email', flat=True))
-    if not subscribers:
-        return JsonResponse({'success': False, 'message': 'No subscribers found.'})
-
-    context = {
-        'subject': subject,
-        'message': message,
-        'site_name': getattr(settings, 'SITE_NAME', 'My Blog'),
-        'domain': getattr(settings, 'DOMAIN', 'http://127.0.0.1:8000/'),
-        'now': timezone.now(),
-    }
-
-    text_body = render_to_string('newsletter/custom_newsletter.txt', context)
-    html_body = render_to_string('newsletter/custom_newsletter.html', context)
-
-    msg = EmailMultiAlternatives(
-        subject=subject,
-        body=text_body,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[settings.DEFAULT_FROM_EMAIL],  # send copy to yourself
-        bcc=subscribers,  # main send list
+    # Queue one delivery per subscriber (plus a copy to ourselves); the
+    # send_newsletters worker sends them in the background
+    job = enqueue_custom_newsletter(
+        subject,
+        message,
+        created_by=request.user,
+        extra_recipients=[(settings.DEFAULT_FROM_EMAIL, '')],
     )
-    msg.attach_alternative(html_body, "text/html")
+    if job is None:
+        return JsonResponse({'success': False, 'message': 'No subscribers found.'})
 
-    try:
-        msg.send(fail_silently=False)
-        return JsonResponse({'success': True, 'message': f'Newsletter sent to {len(subscribers)} subscribers.'})
-    except Exception as e:
-        print("Failed to send newsletter:", e)
-        return JsonResponse({'success': False, 'message': f'Error sending newsletter: {e}'})
\ No newline at end of file
+    return JsonResponse({
+        'success': True,
+        'job_id': job.pk,
+        'message': f'Newsletter queued for {job.total_count} recipients.',
+    })
\ No newline at end of file
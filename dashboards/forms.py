@@ -39,6 +39,9 @@ class AddUserForm(UserCreationForm):
         # If editing an existing user, make username read-only
         if self.instance and self.instance.pk:
             self.fields['username'].disabled = True
+        # Permission labels include their content type; load them in the same query
+        permissions = self.fields['user_permissions']
+        permissions.queryset = permissions.queryset.select_related('content_type')
 
 
 
@@ -46,4 +49,10 @@ class EditUserForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ('username','email', 'first_name', 'last_name', 'is_active', 'is_staff', 
-                  'is_superuser', 'groups', 'user_permissions',)
\ No newline at end of file
+                  'is_superuser', 'groups', 'user_permissions',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Permission labels include their content type; load them in the same query
+        permissions = self.fields['user_permissions']
+        permissions.queryset = permissions.queryset.select_related('content_type')
@@ -1,3 +1,49 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
 
-# Create your tests here.
+from blogs.tests import QueryBudgetTestCase
+
+
+class DashboardQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.author)
+
+    def grow(self):
+        super().grow()
+        for _ in range(2):
+            User.objects.create_user(f'member{next(self._counter)}', password='password')
+
+    def test_dashboard(self):
+        self.assertQueryBudget(reverse('dashboard'), 9)
+
+    def test_categories(self):
+        self.assertQueryBudget(reverse('categories'), 6)
+
+    def test_add_categories(self):
+        self.assertQueryBudget(reverse('add_categories'), 6)
+
+    def test_edit_categories(self):
+        self.assertQueryBudget(reverse('edit_categories', args=[self.category.pk]), 7)
+
+    def test_posts(self):
+        self.assertQueryBudget(reverse('posts'), 12)
+
+    def test_add_posts(self):
+        self.assertQueryBudget(reverse('add_posts'), 7)
+
+    def test_edit_posts(self):
+        self.assertQueryBudget(reverse('edit_posts', args=[self.post.pk]), 9)
+
+    def test_users(self):
+        self.assertQueryBudget(reverse('users'), 7)
+
+    def test_add_users(self):
+        self.assertQueryBudget(reverse('add_users'), 8)
+
+    def test_edit_user(self):
+        self.assertQueryBudget(reverse('edit_user', args=[self.author.pk]), 11)
+
+    def test_performance(self):
+        self.assertQueryBudget(reverse('performance'), 6)
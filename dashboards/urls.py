@@ -20,6 +20,9 @@ urlpatterns = [
     path('users/add/', views.add_users, name="add_users"),
     path('users/edit/<int:pk>/', views.edit_user, name="edit_user"),
     path('users/delete/<int:pk>/', views.delete_user, name="delete_user"),
+
+    # request performance report
+    path('performance/', views.performance, name='performance'),
    
     
 ]
\ No newline at end of file
@@ -5,6 +5,8 @@ from .forms import CategoryForm, BlogPostForm
 from django.contrib import messages
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.contrib.auth.models import User
+from blogs.utils.pagination import KeysetPaginator
+from blogs.utils.profiling import request_stats
 from .forms import AddUserForm, EditUserForm
 
 # Helper function to check if user has admin permissions
@@ -31,7 +33,7 @@ def dashboard(request):
     
     # Get querysets for CURRENT USER only
     user_categories = Category.objects.filter(blogs__author=request.user).distinct()
-    user_recent_posts = Blogs.objects.filter(author=request.user).order_by('-created_at')[:5]
+    user_recent_posts = Blogs.objects.cards().filter(author=request.user).order_by('-created_at')[:5]
 
     context = {
         'category_count': category_count,
@@ -152,9 +154,8 @@ def posts(request):
     draft_count = all_posts.filter(status='draft').count()
     featured_count = all_posts.filter(is_featured=True).count()
     
-    # Create paginated queryset for display (ordered by latest first)
-    posts_list = all_posts.order_by('-created_at')
-    paginator = Paginator(posts_list, 10)  # Show 10 posts per page
+    # Paginate for display (latest first, seeking by created_at instead of OFFSET)
+    paginator = KeysetPaginator(all_posts.cards(), 10, cache_key=f'dashboard_posts:{request.user.pk}')  # Show 10 posts per page
     page = request.GET.get('page')
     
     try:
@@ -357,4 +358,23 @@ def delete_user(request, pk):
     context = {
         'user': user
     }
-    return render(request, 'dashboard/delete_user.html', context)
\ No newline at end of file
+    return render(request, 'dashboard/delete_user.html', context)
+# PERFORMANCE REPORT (Only for superusers/staff)
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser, login_url='dashboard')
+def performance(request):
+    if request.method == 'POST':
+        request_stats.clear()
+        messages.success(request, 'Request statistics cleared.')
+        return redirect('performance')
+
+    records = request_stats.records()
+    context = {
+        'views': request_stats.summary(),
+        'slow_requests': request_stats.slowest(),
+        'request_total': len(records),
+        'since': records[0]['time'] if records else None,
+        'query_budget': request_stats.query_budget,
+        'time_budget': request_stats.time_budget,
+    }
+    return render(request, 'dashboard/performance.html', context)